@@ -0,0 +1,47 @@
+import glob
+import sys
+import time
+from datetime import datetime
+
+from log_index import parse_log_line
+
+
+def legacy_parse_log_line(line):
+    # The previous parser: split on whitespace and round-trip the timestamp through a formatted string
+    line = line.replace(",", "")
+    parts = line.split()
+    event_type = parts[4]
+    pod_name = parts[6]
+    node_name = parts[10] if event_type == "Scheduled" else None
+    timestamp = parts[12]
+    timestamp = datetime.utcfromtimestamp(float(timestamp)).strftime('%Y-%m-%d %H:%M:%S.%f')
+    # get_metrics parsed the string back before computing any latency
+    datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S.%f')
+    return timestamp, event_type, pod_name, node_name
+
+
+def lines_per_second(parse, lines, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            parse(line)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return len(lines) / best
+
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    lines = []
+    for path in sorted(glob.glob("./log-outputs/pod_event_logs_*.txt")):
+        with open(path, 'r') as f:
+            lines.extend(line for line in f if "Event: Pod " in line)
+
+    before = lines_per_second(legacy_parse_log_line, lines, repeat)
+    after = lines_per_second(parse_log_line, lines, repeat)
+    print(f"{len(lines)} lines, best of {repeat}")
+    print(f"before: {before:,.0f} lines/sec")
+    print(f"after:  {after:,.0f} lines/sec ({after / before:.1f}x)")
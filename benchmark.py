@@ -0,0 +1,232 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib.pyplot as plt
+
+from flexsched_analyze import compute_metrics, plot, run
+from log_index import index_log, parse_log_line, service_pods
+from metrics_engine import metric_sketches, pod_columns, summarize
+from synth_logs import generate
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+HISTORY_FILE = os.path.join(BENCHMARK_DIR, "history.jsonl")
+# synthetic logs are generated once per scale and kept here (git-ignored)
+DATA_DIR = os.path.join(BENCHMARK_DIR, "data")
+
+INSTANCES = [1, 5, 10, 25, 50, 100]
+
+
+def bundled_logs():
+    return sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "log-outputs", "pod_event_logs_*.txt")))
+
+
+def synthetic_log(scale):
+    # A log with {scale} times the bursts of a bundled log (five repetitions of every burst size)
+    path = os.path.join(DATA_DIR, f"synthetic_{scale}x.txt")
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        with open(f"{path}.tmp", 'w') as f:
+            f.writelines(generate(INSTANCES, 5 * scale, nodes=3, start=1718453145.0, seed=scale))
+        os.replace(f"{path}.tmp", path)
+    return [path]
+
+
+# Every benchmark prepares its input outside the measurement and returns the function to time and the number of
+# items (lines, files, pod tables) it processes. What the function returns counts as retained memory.
+
+def parse_benchmark(log_files):
+    lines = []
+    for log_file in log_files:
+        with open(log_file, 'r') as f:
+            lines.extend(line for line in f if "hello-" in line)
+
+    def parse():
+        for line in lines:
+            parse_log_line(line)
+    return parse, len(lines)
+
+
+def index_benchmark(log_files):
+    def index():
+        for log_file in log_files:
+            index_log(log_file, use_cache=False)
+    return index, len(log_files)
+
+
+def index_cached_benchmark(log_files):
+    for log_file in log_files:
+        index_log(log_file)
+
+    def index():
+        for log_file in log_files:
+            index_log(log_file)
+    return index, len(log_files)
+
+
+def correlate_benchmark(log_files):
+    indexes = [index_log(log_file) for log_file in log_files]
+
+    def correlate():
+        # the pod tables are returned so their size shows up as the retained memory of the benchmark
+        return [service_pods(index, instance) for index in indexes for instance in INSTANCES]
+    return correlate, len(indexes) * len(INSTANCES)
+
+
+def metrics_benchmark(log_files):
+    tables = [service_pods(index_log(log_file), instance) for log_file in log_files for instance in INSTANCES]
+
+    def metrics():
+        for pods in tables:
+            columns = pod_columns(pods)
+            summarize(columns)
+            metric_sketches(columns)
+    return metrics, sum(len(pods) for pods in tables)
+
+
+def report_benchmark(log_files, workers=1):
+    # End to end: flexsched_analyze.py report over all files as one experiment, into a temporary directory that is
+    # removed after every run
+    plt.switch_backend("Agg")
+
+    def report():
+        with tempfile.TemporaryDirectory() as directory, open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(devnull):
+            config = {
+                'log_dir': "",
+                'results_dir': directory,
+                'images_dir': directory,
+                'instances': INSTANCES,
+                'experiments': {"bench": {'setups': [{'name': os.path.basename(log_file), 'log': log_file}
+                                                     for log_file in log_files]}},
+            }
+            metrics = compute_metrics(config, ["bench"], workers)
+            run(config, ["bench"], metrics)
+            plot(config, ["bench"], metrics, workers=workers, force=True)
+    return report, len(log_files)
+
+BENCHMARKS = {
+    'parse': parse_benchmark,
+    'index': index_benchmark,
+    'index-cached': index_cached_benchmark,
+    'correlate': correlate_benchmark,
+    'metrics': metrics_benchmark,
+    'report': report_benchmark,
+}
+
+
+def measure(benchmark, log_files, repeat):
+    # Best wall-clock time of {repeat} runs, then one extra run under tracemalloc for the peak memory and the memory
+    # still held by its result
+    func, items = benchmark(log_files)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    result = func()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {'seconds': best, 'peak_bytes': peak, 'retained_bytes': retained, 'items': items}
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(names, scales, repeat, history_file):
+    inputs = [("bundled", bundled_logs())] + [(f"synthetic-{scale}x", synthetic_log(scale)) for scale in scales]
+    commit = current_commit()
+    records = []
+    for input_name, log_files in inputs:
+        for name in names:
+            result = measure(BENCHMARKS[name], log_files, repeat)
+            record = {'commit': commit, 'time': time.time(), 'python': platform.python_version(),
+                      'benchmark': name, 'input': input_name, **result}
+            records.append(record)
+            print(f"{name:>12} {input_name:>16}: {result['seconds']:9.4f} s, peak {result['peak_bytes'] / 2 ** 20:8.1f} MiB, "
+                  f"retained {result['retained_bytes'] / 2 ** 20:8.1f} MiB")
+    os.makedirs(os.path.dirname(history_file), exist_ok=True)
+    with open(history_file, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return records
+
+
+def load_history(history_file):
+    with open(history_file, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(history_file, base=None, head=None, threshold=0.1):
+    # Compare the latest results of two commits (default: the last two commits in the history) and flag every
+    # benchmark whose time or peak memory grew by more than {threshold}
+    history = load_history(history_file)
+    commits = list(dict.fromkeys(record['commit'] for record in history))
+    if head is None:
+        head = commits[-1] if commits else None
+    if base is None:
+        earlier = [commit for commit in commits if commit != head]
+        base = earlier[-1] if earlier else None
+    if base is None or head is None:
+        # nothing to compare against yet, e.g. the first benchmarked commit
+        print("The history does not have results of two commits yet, nothing to compare")
+        return True
+
+    latest = {}
+    for record in history:
+        latest[(record['commit'], record['benchmark'], record['input'])] = record
+
+    regressions = False
+    for (commit, name, input_name), new in latest.items():
+        if commit != head or (base, name, input_name) not in latest:
+            continue
+        old = latest[(base, name, input_name)]
+        flags = []
+        for key, label in [('seconds', "time"), ('peak_bytes', "memory")]:
+            if old[key] > 0 and new[key] > old[key] * (1 + threshold):
+                flags.append(f"{label} +{(new[key] / old[key] - 1) * 100:.0f}%")
+        regressions |= bool(flags)
+        print(f"{name:>12} {input_name:>16}: {old['seconds']:9.4f} s -> {new['seconds']:9.4f} s, "
+              f"{old['peak_bytes'] / 2 ** 20:8.1f} -> {new['peak_bytes'] / 2 ** 20:8.1f} MiB"
+              f"{'  REGRESSION: ' + ', '.join(flags) if flags else ''}")
+    return not regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the log analysis pipeline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks and append the results to the history")
+    run_parser.add_argument("-b", "--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    run_parser.add_argument("-s", "--scales", type=int, nargs="*", default=[10, 100, 1000],
+                            help="sizes of the synthetic inputs relative to a bundled log")
+    run_parser.add_argument("-r", "--repeat", type=int, default=3, help="timed runs per benchmark")
+    run_parser.add_argument("--history", default=HISTORY_FILE)
+
+    compare_parser = subparsers.add_parser("compare", help="flag regressions between two commits in the history")
+    compare_parser.add_argument("base", nargs="?", help="baseline commit (default: the previous one)")
+    compare_parser.add_argument("head", nargs="?", help="commit to check (default: the latest one)")
+    compare_parser.add_argument("-t", "--threshold", type=float, default=0.1, help="allowed relative slowdown")
+    compare_parser.add_argument("--history", default=HISTORY_FILE)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run_benchmarks(args.benchmarks, args.scales, args.repeat, args.history)
+    else:
+        sys.exit(0 if compare(args.history, args.base, args.head, args.threshold) else 1)
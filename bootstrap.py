@@ -0,0 +1,110 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+
+RESAMPLES = 2000
+CONFIDENCE = 0.95
+# Resamples are drawn in batches of about this many indices
+BATCH_ELEMENTS = 1 << 22
+
+# metric name -> key of the per-pod values in flexsched_analyze.setup_metrics
+COMPARED_METRICS = {
+    'start-up time': 'startup',
+    'queue time': 'queue',
+    'scheduling latency': 'scheduling',
+}
+COMPARISON_HEADER = ["baseline", "setup", "instances", "metric", "baseline mean", "setup mean", "difference",
+                     "ci low", "ci high", "p-value"]
+
+
+def resampling_units(values, run_ids):
+    # (sums, counts) of the units a sample is resampled in: its runs (bursts). The pods of a run wait in the same
+    # queue, so their values are correlated and only whole runs are independent draws; resampling single pods
+    # would make the confidence intervals too narrow.
+    values = np.asarray(values, dtype=np.float64)
+    _, runs = np.unique(run_ids, return_inverse=True)
+    return np.bincount(runs, values), np.bincount(runs).astype(np.float64)
+
+
+def bootstrap_means(sums, counts, resamples, rng):
+    # Means of {resamples} resamples with replacement of the units, all resamples of a batch in one numpy operation
+    n = len(sums)
+    means = np.empty(resamples)
+    batch = max(1, BATCH_ELEMENTS // n)
+    for start in range(0, resamples, batch):
+        picks = rng.integers(0, n, size=(min(batch, resamples - start), n))
+        means[start:start + len(picks)] = sums[picks].sum(axis=1) / counts[picks].sum(axis=1)
+    return means
+
+
+def bootstrap_difference(units_a, units_b, resamples=RESAMPLES, confidence=CONFIDENCE, seed=None):
+    # Percentile bootstrap of mean(b) - mean(a): the difference, its confidence interval and the two-sided p-value
+    # of the difference being 0 (how often the resampled difference falls on the other side of 0)
+    rng = np.random.default_rng(seed)
+    differences = bootstrap_means(*units_b, resamples, rng) - bootstrap_means(*units_a, resamples, rng)
+    alpha = 1 - confidence
+    low, high = np.quantile(differences, [alpha / 2, 1 - alpha / 2])
+    below = np.count_nonzero(differences <= 0)
+    above = np.count_nonzero(differences >= 0)
+    p_value = min(1.0, 2 * (min(below, above) + 1) / (resamples + 1))
+    return float(low), float(high), float(p_value)
+
+
+def compare_samples(pairs, resamples=RESAMPLES, confidence=CONFIDENCE, seed=0, workers=None):
+    # Bootstrap every (a, b) pair of samples, each a (values, run ids) pair of arrays:
+    # (mean a, mean b, difference, ci low, ci high, p-value) per pair.
+    # Every pair gets its own random stream from {seed}, so the results do not depend on the number of workers.
+    # Samples are reduced to their resampling units here; only those travel to the worker processes.
+    pairs = list(pairs)
+    seeds = np.random.SeedSequence(seed).spawn(len(pairs))
+    jobs = []
+    for ((a, runs_a), (b, runs_b)), pair_seed in zip(pairs, seeds):
+        if len(a) == 0 or len(b) == 0:
+            jobs.append(None)
+            continue
+        jobs.append((resampling_units(a, runs_a), resampling_units(b, runs_b), resamples, confidence, pair_seed))
+
+    todo = [job for job in jobs if job is not None]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(todo) <= 1:
+        intervals = [bootstrap_difference(*job) for job in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            intervals = list(pool.map(bootstrap_difference, *zip(*todo), chunksize=max(1, len(todo) // (4 * workers))))
+
+    results = []
+    intervals = iter(intervals)
+    for ((a, _), (b, _)), job in zip(pairs, jobs):
+        mean_a = float(np.mean(a)) if len(a) > 0 else float('nan')
+        mean_b = float(np.mean(b)) if len(b) > 0 else float('nan')
+        low, high, p_value = next(intervals) if job is not None else (float('nan'),) * 3
+        results.append((mean_a, mean_b, mean_b - mean_a, low, high, p_value))
+    return results
+
+
+def metric_sample(metrics, key):
+    # (values, run ids) of one metric of flexsched_analyze.setup_metrics. Queue time and scheduling latency leave out
+    # the first pod, so their values line up with the last run ids.
+    values = metrics[key]
+    run_ids = metrics['run_id']
+    return values, run_ids[len(run_ids) - len(values):]
+
+
+def comparison_rows(setups, metrics, resamples=RESAMPLES, confidence=CONFIDENCE, seed=0, workers=None):
+    # COMPARISON_HEADER rows for every pair of setups of an experiment, at every instance count both were run with,
+    # for every metric; metrics maps (log path, instances) to flexsched_analyze.setup_metrics
+    keys = []
+    pairs = []
+    for baseline, setup in combinations(setups, 2):
+        for instance in baseline['instances']:
+            if instance not in setup['instances']:
+                continue
+            for metric, key in COMPARED_METRICS.items():
+                keys.append((baseline['name'], setup['name'], instance, metric))
+                pairs.append((metric_sample(metrics[(baseline['path'], instance)], key),
+                               metric_sample(metrics[(setup['path'], instance)], key)))
+    results = compare_samples(pairs, resamples, confidence, seed, workers)
+    return [[*key, *result] for key, result in zip(keys, results)]
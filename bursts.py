@@ -0,0 +1,26 @@
+import re
+
+import numpy as np
+
+# hello-5-instances-00001-deployment-5c5c948c66-xxxxx: revision 00001, ReplicaSet hash 5c5c948c66.
+# Every repetition of a burst deploys the service again and gets a new ReplicaSet hash.
+DEPLOYMENT_PATTERN = re.compile(r"-(\d+)-deployment-([0-9a-z]+)-[0-9a-z]+$")
+
+# A pause of this many seconds between two Created events also starts a new burst
+MAX_GAP = 10.0
+
+
+def deployment_key(pod_name):
+    # (revision, ReplicaSet hash) of a pod, or None when the pod name does not have that shape
+    match = DEPLOYMENT_PATTERN.search(pod_name)
+    return match.groups() if match else None
+
+
+def deployment_burst_ids(key_ids, creation_ts, max_gap=MAX_GAP):
+    # Number the bursts of a service's pods, given in pod table order by the id of their deployment key: a new burst
+    # starts where the revision/deployment hash changes or where no pod was created for more than {max_gap} seconds
+    if len(key_ids) == 0:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.zeros(len(key_ids), dtype=bool)
+    starts[1:] = (key_ids[1:] != key_ids[:-1]) | (np.diff(creation_ts) > max_gap)
+    return np.cumsum(starts)
@@ -0,0 +1,158 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+import instrument
+from bursts import deployment_key
+from pod_table import PodTable
+
+# Bump when the layout of the cache changes so older caches are rebuilt
+CACHE_VERSION = 4
+
+EVENT_DTYPE = np.dtype([
+    ('timestamp', np.float64),
+    ('instances', np.int32),
+    ('revision', np.int32),
+    ('event_type', np.int8),
+    ('pod', np.int32),
+    ('node', np.int32),
+    ('deployment', np.int32),
+])
+
+
+def cache_dir(log_file):
+    # The cache lives next to the log: pod_event_logs_base-1-100.txt -> pod_event_logs_base-1-100.txt.cache/
+    return f"{log_file}.cache"
+
+
+def file_signature(log_file):
+    stat = os.stat(log_file)
+    return {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def write_cache(log_file, events, counts):
+    # events are the (instances, revision, (timestamp, event_type, pod_name, node_name)) tuples of an index, see
+    # log_index.index_events, so only the first Created and Scheduled event of every pod is cached. counts are the
+    # counters of the parse (lines read, ...), kept so a cache hit reports the same counters.
+    # Strings are stored once in lookup tables, the events themselves as one fixed-width record array. The deployment
+    # key of every pod (see bursts.deployment_key) is stored too, so pod tables are built without the pod names.
+    tables = {'revision': {}, 'event_type': {}, 'pod': {}, 'node': {}, 'deployment': {}}
+    columns = {name: [] for name in EVENT_DTYPE.names}
+    pod_deployments = []
+    for instances, revision, (timestamp, event_type, pod_name, node_name) in events:
+        pod = tables['pod'].setdefault(pod_name, len(tables['pod']))
+        if pod == len(pod_deployments):
+            key = deployment_key(pod_name)
+            pod_deployments.append(tables['deployment'].setdefault(key, len(tables['deployment'])))
+        columns['timestamp'].append(timestamp)
+        columns['instances'].append(instances)
+        columns['revision'].append(tables['revision'].setdefault(revision, len(tables['revision'])))
+        columns['event_type'].append(tables['event_type'].setdefault(event_type, len(tables['event_type'])))
+        columns['pod'].append(pod)
+        columns['node'].append(-1 if node_name is None else tables['node'].setdefault(node_name, len(tables['node'])))
+        columns['deployment'].append(pod_deployments[pod])
+    records = np.empty(len(columns['timestamp']), dtype=EVENT_DTYPE)
+    for name, values in columns.items():
+        records[name] = values
+
+    meta = file_signature(log_file)
+    meta.update({name: list(table) for name, table in tables.items()})
+    meta['counts'] = counts
+
+    # Write into a temporary directory first so a reader never sees a half-written cache
+    directory = cache_dir(log_file)
+    tmp_directory = f"{directory}.tmp{os.getpid()}"
+    try:
+        os.makedirs(tmp_directory, exist_ok=True)
+        np.save(os.path.join(tmp_directory, "events.npy"), records)
+        with open(os.path.join(tmp_directory, "meta.json"), 'w') as f:
+            json.dump(meta, f)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_directory, directory)
+    except OSError:
+        # A read-only log directory just means no cache
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+
+
+def load_cache(log_file):
+    # Return (records, meta) with the records memory-mapped, or None when there is no cache or the log has changed
+    directory = cache_dir(log_file)
+    try:
+        with open(os.path.join(directory, "meta.json"), 'r') as f:
+            meta = json.load(f)
+        signature = file_signature(log_file)
+        if any(meta.get(key) != value for key, value in signature.items()):
+            return None
+        records = np.load(os.path.join(directory, "events.npy"), mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    return records, meta
+
+
+class CachedIndex:
+    # The index of a log (see log_index.index_log) as the memory-mapped cache columns. Pod tables are built from the
+    # columns with numpy; event tuples with their names are only rebuilt for the callers that ask for them.
+
+    def __init__(self, records, meta):
+        self.records = records
+        self.meta = meta
+        self.event_type_ids = {name: i for i, name in enumerate(meta['event_type'])}
+
+    def instances(self):
+        return np.unique(self.records['instances']).tolist()
+
+    def service_rows(self, instances):
+        # Rows of the hello-{instances}-instances service, revision by revision in order of first appearance and in
+        # file order within a revision, the order of log_index.service_events
+        rows = np.flatnonzero(self.records['instances'] == instances)
+        revisions, first, inverse = np.unique(self.records['revision'][rows], return_index=True, return_inverse=True)
+        rank = np.empty(len(revisions), dtype=np.int64)
+        rank[np.argsort(first)] = np.arange(len(revisions))
+        return rows[np.argsort(rank[inverse], kind='stable')]
+
+    def events(self, instances):
+        # The (timestamp, event_type, pod_name, node_name) events of a service, like log_index.service_events
+        records = self.records[self.service_rows(instances)]
+        event_types = self.meta['event_type']
+        pods = self.meta['pod']
+        nodes = self.meta['node']
+        for timestamp, event_type, pod, node in zip(records['timestamp'].tolist(), records['event_type'].tolist(),
+                                                    records['pod'].tolist(), records['node'].tolist()):
+            yield timestamp, event_types[event_type], pods[pod], nodes[node] if node >= 0 else None
+
+    @instrument.timed("correlate")
+    def pod_table(self, instances):
+        # The pod table log_index.correlate_pods builds from the events of a service. The cache has only the first
+        # Created and Scheduled event of every pod, so every pod gets its columns from at most one row of each.
+        rows = self.service_rows(instances)
+        event_type = self.records['event_type'][rows]
+        created = event_type == self.event_type_ids.get("Created", -1)
+        scheduled = event_type == self.event_type_ids.get("Scheduled", -1)
+        rows = rows[created | scheduled]
+        created = created[created | scheduled]
+        scheduled = ~created
+        records = self.records[rows]
+
+        # pods in order of first appearance
+        pods, first, inverse = np.unique(records['pod'], return_index=True, return_inverse=True)
+        position = np.empty(len(pods), dtype=np.int64)
+        position[np.argsort(first)] = np.arange(len(pods))
+        pod = position[inverse]
+
+        creation = np.full(len(pods), np.nan)
+        creation[pod[created]] = records['timestamp'][created]
+        scheduled_ts = np.full(len(pods), np.nan)
+        scheduled_ts[pod[scheduled]] = records['timestamp'][scheduled]
+        # a Scheduled event without a node gets the extra node None at the end of the node list
+        nodes = self.meta['node'] + [None]
+        node = np.full(len(pods), -1, dtype=np.int32)
+        node[pod[scheduled]] = np.where(records['node'][scheduled] >= 0, records['node'][scheduled], len(nodes) - 1)
+        deployment = np.empty(len(pods), dtype=np.int32)
+        deployment[pod] = records['deployment']
+        deployments = [tuple(key) if key is not None else None for key in self.meta['deployment']]
+
+        instrument.count("events correlated", len(rows))
+        instrument.count("pods correlated", len(pods))
+        return PodTable.from_columns(creation, scheduled_ts, node, nodes, deployment, deployments)
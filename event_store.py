@@ -0,0 +1,231 @@
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import sys
+
+import numpy as np
+
+from experiments import DEFAULT_CONFIG, experiment_setups, load_config
+from log_index import SERVICE_PATTERN, correlate_pods, index_log, service_events, service_instances
+from log_io import COMPRESSED_SUFFIXES
+from metrics_engine import pod_columns, queue_times, startup_times
+
+# Every log in one SQLite database, for queries across experiments without parsing the logs again.
+#   logs:   one row per ingested log file, its setup name and the size/mtime it had when it was ingested
+#   setups: which experiments of experiments.json use which log, under which label
+#   events: the first Created and the first Scheduled event of every pod of a hello-N-instances service
+#   pods:   the pod table of every service with the per-pod start-up time, queue time and scheduling latency.
+#           seq is the position in the pod table among the pods with both events (NULL for the others); queue time
+#           and scheduling latency are NULL for the first pod, which has no predecessor, like in the averages.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    setup TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS setups (
+    experiment TEXT NOT NULL,
+    setup TEXT NOT NULL,
+    label TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (experiment, setup)
+);
+CREATE TABLE IF NOT EXISTS events (
+    log_id INTEGER NOT NULL,
+    instances INTEGER NOT NULL,
+    revision TEXT NOT NULL,
+    pod_id INTEGER NOT NULL,
+    event_type TEXT NOT NULL,
+    node TEXT,
+    timestamp REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pods (
+    id INTEGER PRIMARY KEY,
+    log_id INTEGER NOT NULL,
+    instances INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    seq INTEGER,
+    run INTEGER,
+    node TEXT,
+    creation REAL,
+    scheduled REAL,
+    startup REAL,
+    queue REAL,
+    scheduling REAL
+);
+CREATE INDEX IF NOT EXISTS events_pod ON events (log_id, instances, pod_id, timestamp);
+CREATE INDEX IF NOT EXISTS pods_service ON pods (log_id, instances, seq);
+CREATE INDEX IF NOT EXISTS pods_instances ON pods (instances, log_id);
+"""
+
+DEFAULT_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "events.sqlite")
+LOG_PATTERN = re.compile(r"pod_event_logs_(.+?)(?:-\d+-\d+)?\.txt$")
+
+
+class Percentile:
+    # percentile(value, p) aggregate: the p-th percentile of the non-NULL values, interpolated like numpy
+
+    def __init__(self):
+        self.values = []
+        self.p = None
+
+    def step(self, value, p):
+        self.p = p
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        if not self.values:
+            return None
+        return float(np.percentile(self.values, self.p))
+
+
+def connect(path=DEFAULT_STORE):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.create_aggregate("percentile", 2, Percentile)
+    return conn
+
+
+def setup_name(log_file):
+    # pod_event_logs_base-1-100.txt -> base
+    name = os.path.basename(log_file)
+    for suffix in COMPRESSED_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    match = LOG_PATTERN.match(name)
+    return match.group(1) if match else name
+
+
+def service_rows(log_id, instances, events, next_pod_id):
+    # The pods and events rows of one service from its (revision, event) pairs; pods get ids from {next_pod_id} on,
+    # in pod table order
+    pods = correlate_pods(event for _, event in events)
+    # correlate_pods numbers pods in order of first Created or Scheduled event
+    names = list(dict.fromkeys(event[2] for _, event in events if event[1] in ("Created", "Scheduled")))
+    pod_ids = {name: next_pod_id + i for i, name in enumerate(names)}
+
+    columns = pod_columns(pods)
+    complete = np.flatnonzero(~np.isnan(np.array(pods.creation)) & ~np.isnan(np.array(pods.scheduled)))
+    durations = startup_times(columns)
+    queued = queue_times(columns)
+    seq = {pod: i for i, pod in enumerate(complete.tolist())}
+
+    pod_rows = []
+    for pod, name in enumerate(names):
+        node = pods.nodes[pods.node[pod]] if pods.node[pod] >= 0 else None
+        creation = None if np.isnan(pods.creation[pod]) else pods.creation[pod]
+        scheduled = None if np.isnan(pods.scheduled[pod]) else pods.scheduled[pod]
+        i = seq.get(pod)
+        if i is None:
+            pod_rows.append((pod_ids[name], log_id, instances, name, None, None, node, creation, scheduled,
+                             None, None, None))
+            continue
+        queue = float(queued[i]) if i > 0 else None
+        scheduling = float(durations[i] - queued[i]) if i > 0 else None
+        pod_rows.append((pod_ids[name], log_id, instances, name, i, int(columns['run_id'][i]), node, creation,
+                         scheduled, float(durations[i]), queue, scheduling))
+
+    event_rows = [(log_id, instances, revision, pod_ids[pod_name], event_type, node_name, timestamp)
+                  for revision, (timestamp, event_type, pod_name, node_name) in events
+                  if pod_name in pod_ids]
+    return pod_rows, event_rows
+
+
+def ingest_log(conn, log_file):
+    # Load one log into the store, replacing what was ingested from it before. Returns False when the store
+    # already has the log as it is on disk.
+    path = os.path.abspath(log_file)
+    stat = os.stat(path)
+    row = conn.execute("SELECT id, size, mtime_ns FROM logs WHERE path = ?", (path,)).fetchone()
+    if row is not None and row[1:] == (stat.st_size, stat.st_mtime_ns):
+        return False
+
+    index = index_log(log_file)
+    with conn:
+        if row is not None:
+            conn.execute("DELETE FROM events WHERE log_id = ?", (row[0],))
+            conn.execute("DELETE FROM pods WHERE log_id = ?", (row[0],))
+            conn.execute("DELETE FROM logs WHERE id = ?", (row[0],))
+        log_id = conn.execute("INSERT INTO logs (path, setup, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                              (path, setup_name(log_file), stat.st_size, stat.st_mtime_ns)).lastrowid
+        next_pod_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM pods").fetchone()[0]
+        for instances in service_instances(index):
+            events = [(SERVICE_PATTERN.match(event[2]).group(2), event) for event in service_events(index, instances)]
+            pod_rows, event_rows = service_rows(log_id, instances, events, next_pod_id)
+            conn.executemany("INSERT INTO pods VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", pod_rows)
+            conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", event_rows)
+            next_pod_id += len(pod_rows)
+    return True
+
+
+def ingest_setups(conn, config):
+    with conn:
+        conn.execute("DELETE FROM setups")
+        for experiment in config['experiments']:
+            for setup in experiment_setups(config, experiment):
+                conn.execute("INSERT INTO setups VALUES (?, ?, ?, ?)",
+                             (experiment, setup['name'], setup['label'], os.path.abspath(setup['path'])))
+
+
+def ingest(conn, log_files, config=None):
+    for log_file in log_files:
+        if ingest_log(conn, log_file):
+            print(f"Ingested {log_file}")
+    if config is not None:
+        ingest_setups(conn, config)
+
+
+def store_columns(conn, log_file, instances):
+    # The pod_columns of a service, read from the pods table
+    rows = conn.execute("SELECT p.creation, p.scheduled, p.node, p.run FROM pods p JOIN logs l ON p.log_id = l.id "
+                        "WHERE l.path = ? AND p.instances = ? AND p.seq IS NOT NULL ORDER BY p.seq",
+                        (os.path.abspath(log_file), instances)).fetchall()
+    nodes = {}
+    node_ids = [nodes.setdefault(node, len(nodes)) for _, _, node, _ in rows]
+    return {
+        'creation_ts': np.array([row[0] for row in rows], dtype=np.float64),
+        'scheduled_ts': np.array([row[1] for row in rows], dtype=np.float64),
+        'node_id': np.array(node_ids, dtype=np.int32),
+        'nodes': list(nodes),
+        'run_id': np.array([row[3] for row in rows], dtype=np.int64),
+    }
+
+
+def print_query(conn, sql):
+    cursor = conn.execute(sql)
+    print(", ".join(column[0] for column in cursor.description))
+    for row in cursor:
+        print(", ".join(str(value) for value in row))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load pod event logs into an SQLite database and query it")
+    parser.add_argument("--db", default=DEFAULT_STORE, help="database file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="load (new or changed) logs into the database")
+    ingest_parser.add_argument("logs", nargs="*", help="log files (default: log-outputs/pod_event_logs_*)")
+    ingest_parser.add_argument("-c", "--config", default=DEFAULT_CONFIG, help="experiments config file")
+
+    query_parser = subparsers.add_parser("query", help="run an SQL query, percentile(value, p) is available")
+    query_parser.add_argument("sql")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == "ingest":
+        config = load_config(args.config)
+        log_files = args.logs or sorted(path for path in glob.glob(os.path.join(config.get('log_dir', "log-outputs"),
+                                                                                "pod_event_logs_*"))
+                                        if not path.endswith(".cache") and not path.endswith(".cursor"))
+        ingest(conn, log_files, config)
+    else:
+        try:
+            print_query(conn, args.sql)
+        except sqlite3.Error as e:
+            print(f"Error: {e}")
+            sys.exit(1)
@@ -0,0 +1,39 @@
+import json
+import os
+
+from log_io import find_log
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "experiments.json")
+
+
+def load_config(path=DEFAULT_CONFIG):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def experiment_setups(config, experiment):
+    # The setups of an experiment with their label, log file and instance counts filled in from the defaults.
+    # A setup can override the log file ("log") and the instance counts ("instances") it was run with.
+    # A log that was archived compressed (.gz, .zst) is found without changing its name in the config.
+    experiment = str(experiment)
+    if experiment not in config['experiments']:
+        raise KeyError(f"Invalid experiment number: {experiment}")
+    setups = []
+    for setup in config['experiments'][experiment]['setups']:
+        name = setup['name']
+        log = setup.get('log', f"pod_event_logs_{name}-1-100.txt")
+        setups.append({
+            'name': name,
+            'label': setup.get('label', name),
+            'path': find_log(os.path.join(config.get('log_dir', "log-outputs"), log)),
+            'instances': setup.get('instances', config['instances']),
+        })
+    return setups
+
+
+def results_path(config, experiment, name="results"):
+    return os.path.join(config.get('results_dir', "results"), f"experiment_{experiment}_{name}.csv")
+
+
+def image_path(config, name):
+    return os.path.join(config.get('images_dir', "images"), f"{name}.png")
@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from log_io import open_log
+
+# Incremental replacement for fetch_pod_events.sh: only the lines a logger pod wrote since the last fetch are
+# downloaded and appended. The position reached in every pod's log is kept in {output}.cursor as the timestamp
+# kubectl logs --timestamps printed for the last fetched line.
+
+
+def cursor_path(output):
+    return f"{output}.cursor"
+
+
+def load_cursors(output):
+    try:
+        with open(cursor_path(output), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_cursors(output, cursors):
+    tmp = f"{cursor_path(output)}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(cursors, f, indent=2)
+    os.replace(tmp, cursor_path(output))
+
+
+def timestamp_key(timestamp):
+    # RFC 3339 timestamps with nanoseconds, 2024-06-15T12:06:29.267890123Z, with trailing zeros possibly trimmed;
+    # pad the fraction so they compare correctly as strings
+    seconds, _, fraction = timestamp.rstrip("Z").partition(".")
+    return f"{seconds}.{fraction:0<9}"
+
+
+def logger_pods(kubectl, namespace, selector):
+    result = subprocess.run([kubectl, "get", "pods", "-n", namespace, "-l", selector,
+                             "-o", "jsonpath={.items[*].metadata.name}"], capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def fetch_pod(kubectl, namespace, pod, since):
+    # The lines of {pod} logged after the cursor {since} (None for all of them) and the new cursor.
+    # --since-time only has second precision and includes its bound, so lines up to the cursor itself are dropped.
+    command = [kubectl, "logs", "-n", namespace, pod, "--timestamps"]
+    if since is not None:
+        command.append(f"--since-time={since.partition('.')[0]}Z")
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    lines = []
+    for line in result.stdout.splitlines(keepends=True):
+        timestamp, _, line = line.partition(" ")
+        if not line:
+            continue
+        timestamp = timestamp_key(timestamp)
+        if since is not None and timestamp <= since:
+            continue
+        lines.append(line)
+        since = timestamp
+    return lines, since
+
+
+def fetch(output, namespace, selector, kubectl="kubectl", workers=4):
+    # Fetch all logger pods concurrently and append their new lines to {output}, one pod at a time so lines of
+    # different pods are never interleaved. A pod's cursor is saved as soon as its lines are written, so lines already
+    # in {output} are not fetched again even when a later pod fails.
+    cursors = load_cursors(output)
+    pods = logger_pods(kubectl, namespace, selector)
+    if not pods:
+        raise RuntimeError(f"Could not find a pod with label {selector} in namespace {namespace}")
+    written = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pods)))) as pool:
+        futures = {pod: pool.submit(fetch_pod, kubectl, namespace, pod, cursors.get(pod)) for pod in pods}
+        with open_log(output, 'a') as out:
+            for pod, future in futures.items():
+                try:
+                    lines, cursor = future.result()
+                except subprocess.CalledProcessError as e:
+                    print(f"Error: Failed to fetch logs from {pod}: {e.stderr.strip()}", file=sys.stderr)
+                    continue
+                out.writelines(lines)
+                out.flush()
+                written += len(lines)
+                print(f"{pod}: {len(lines)} new lines")
+                if cursor is not None and cursor != cursors.get(pod):
+                    cursors[pod] = cursor
+                    save_cursors(output, cursors)
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Append the new lines of the pod-event-logger pods to a log file")
+    parser.add_argument("output", help="log file, compressed when it ends in .gz or .zst, "
+                                       "e.g. log-outputs/pod_event_logs_base-1-100.txt.gz")
+    parser.add_argument("-n", "--namespace", default="default", help="namespace of the logger pods")
+    parser.add_argument("-l", "--selector", default="app=pod-event-logger", help="label selector of the logger pods")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="pods fetched concurrently")
+    parser.add_argument("--kubectl", default=os.environ.get("KUBECTL", "kubectl"), help="kubectl executable")
+    args = parser.parse_args()
+
+    try:
+        written = fetch(args.output, args.namespace, args.selector, args.kubectl, args.workers)
+    except (RuntimeError, subprocess.CalledProcessError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Wrote {written} lines to {args.output}")
@@ -0,0 +1,214 @@
+import argparse
+import sys
+import time
+
+import matplotlib.pyplot as plt
+
+import instrument
+from analyze_logs import RESULTS_HEADER, write_results
+from boxplot import box_stats
+from bootstrap import COMPARISON_HEADER, CONFIDENCE, RESAMPLES, comparison_rows
+from event_store import connect, ingest, store_columns
+from experiments import DEFAULT_CONFIG, experiment_setups, image_path, load_config, results_path
+from log_index import service_pods
+from metrics_engine import (metric_sketches, pod_columns, queue_times, run_means, run_scheduling_latencies,
+                            scheduling_latencies, startup_times, summarize, tail_latencies)
+from node_stats import NODE_HEADER, THROUGHPUT_HEADER, node_metrics, node_rows, throughput_rows
+from parallel import sweep
+from queue_depth import burst_queue_depth_series
+from render import draw_figure, render
+
+# metric name -> (file name part, axis label) of the box plots
+BOXPLOT_METRICS = {
+    'startup': ('start_up_time', 'Start-up Time (seconds)'),
+    'queue': ('queue_times', 'Queue Time (seconds)'),
+    'scheduling': ('scheduling_latencies', 'Scheduling Latencies (seconds)'),
+}
+
+
+@instrument.timed("metrics")
+def setup_metrics(index, instances):
+    # Everything run, plot and report need for one service, computed from a single pod table
+    return columns_metrics(pod_columns(service_pods(index, instances)))
+
+
+def columns_metrics(columns):
+    run_id = columns['run_id']
+    durations = startup_times(columns)
+    queued = queue_times(columns)
+    run_latencies = run_scheduling_latencies(durations, queued, run_id)
+    return {
+        'summary': summarize(columns) + tail_latencies(metric_sketches(columns)),
+        'startup': durations,
+        'queue': queued[1:],
+        'scheduling': scheduling_latencies(durations, queued),
+        'avg_startup': run_means(durations, run_id),
+        'avg_queue': run_means(queued, run_id),
+        'avg_scheduling': run_means(run_latencies, run_id),
+        'nodes': node_metrics(columns),
+        'queue_depth': burst_queue_depth_series(columns),
+        'run_id': run_id,
+    }
+
+
+def compute_metrics(config, experiments, workers=None, store=None):
+    # Every log file is indexed once, for the union of the instance counts any requested experiment needs from it.
+    # With an event store (event_store.py) the pod tables are read from the database instead, after ingesting the
+    # logs it does not have yet.
+    needed = {}
+    for experiment in experiments:
+        for setup in experiment_setups(config, experiment):
+            needed.setdefault(setup['path'], set()).update(setup['instances'])
+    jobs = [(path, sorted(instances)) for path, instances in needed.items()]
+
+    metrics = {}
+    if store is not None:
+        conn = connect(store)
+        ingest(conn, [path for path, _ in jobs], config)
+        for path, instances in jobs:
+            for instance in instances:
+                with instrument.timer("metrics"):
+                    metrics[(path, instance)] = columns_metrics(store_columns(conn, path, instance))
+        conn.close()
+        return metrics
+    for (path, instances), results in zip(jobs, sweep(setup_metrics, jobs, workers)):
+        for instance, result in zip(instances, results):
+            metrics[(path, instance)] = result
+    return metrics
+
+
+def results_rows(setups, metrics):
+    rows = []
+    for setup in setups:
+        for instance in setup['instances']:
+            rows.append([setup['name'], instance, *metrics[(setup['path'], instance)]['summary']])
+    return rows
+
+
+@instrument.timed("write results")
+def run(config, experiments, metrics):
+    for experiment in experiments:
+        setups = experiment_setups(config, experiment)
+        node_results = []
+        throughput_results = []
+        for setup in setups:
+            for instance in setup['instances']:
+                nodes = metrics[(setup['path'], instance)]['nodes']
+                node_results.extend(node_rows(setup['name'], instance, nodes))
+                throughput_results.extend(throughput_rows(setup['name'], instance, nodes))
+
+        for name, header, rows in [("results", RESULTS_HEADER, results_rows(setups, metrics)),
+                                   ("nodes", NODE_HEADER, node_results),
+                                   ("node_throughput", THROUGHPUT_HEADER, throughput_results)]:
+            path = results_path(config, experiment, name)
+            write_results(path, rows, header)
+            print(f"Wrote {path}")
+
+
+def figures(config, experiments, metrics):
+    # (path, kind, args) of every figure of the experiments, see render.py. The box statistics of every service are
+    # computed once, however many experiments plot the same log.
+    stats = {}
+
+    def service_stats(setup, instance, key):
+        if (setup['path'], instance, key) not in stats:
+            stats[(setup['path'], instance, key)] = box_stats(metrics[(setup['path'], instance)][key])
+        return stats[(setup['path'], instance, key)]
+
+    result = []
+    for experiment in experiments:
+        setups = experiment_setups(config, experiment)
+        labels = [setup['label'] for setup in setups]
+        instances = config['instances']
+
+        for prefix, key_prefix, ylabel_prefix in [("", "", ""), ("avg_", "avg_", "Average ")]:
+            for metric, (name, ylabel) in BOXPLOT_METRICS.items():
+                boxplot_stats = {setup['name']: [service_stats(setup, instance, key_prefix + metric)
+                                                 for instance in setup['instances']]
+                                 for setup in setups}
+                result.append((image_path(config, f"{prefix}{experiment}_boxplot_{name}"), "boxplot",
+                               (boxplot_stats, labels, instances, ylabel_prefix + ylabel)))
+
+        rows = results_rows(setups, metrics)
+        setup_labels = {setup['name']: setup['label'] for setup in setups}
+        result.append((image_path(config, f"{experiment}_average_start_up_time"), "average_start_up_time",
+                       (rows, RESULTS_HEADER, setup_labels)))
+        result.append((image_path(config, f"{experiment}_performance_metrics"), "performance_metrics",
+                       (rows, RESULTS_HEADER, setup_labels)))
+
+        # queue depth under the largest burst, for the setups that were run with it
+        instance = max(instances)
+        series = {setup['name']: metrics[(setup['path'], instance)]['queue_depth']
+                  for setup in setups if instance in setup['instances']}
+        result.append((image_path(config, f"{experiment}_queue_depth_{instance}"), "queue_depth", (series, setup_labels)))
+    return result
+
+
+@instrument.timed("compare")
+def compare(config, experiments, metrics, workers=None, resamples=RESAMPLES, confidence=CONFIDENCE):
+    # Bootstrap confidence intervals and p-values of the differences between every two setups of an experiment
+    for experiment in experiments:
+        rows = comparison_rows(experiment_setups(config, experiment), metrics, resamples, confidence, workers=workers)
+        path = results_path(config, experiment, "comparison")
+        write_results(path, rows, COMPARISON_HEADER)
+        print(f"Wrote {path}")
+
+
+@instrument.timed("plot")
+def plot(config, experiments, metrics, show=False, workers=None, force=False):
+    figure_list = figures(config, experiments, metrics)
+    if not show:
+        render(figure_list, config.get('images_dir', "images"), workers, force)
+        return
+    for path, kind, args in figure_list:
+        fig = draw_figure(kind, args)
+        plt.show()
+        fig.savefig(path)
+        plt.close(fig)
+        print(f"Wrote {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="flexsched-analyze", description="Analyze FlexSched pod event logs")
+    parser.add_argument("command", choices=["run", "compare", "plot", "report"],
+                        help="run: write the results CSVs, compare: write the setup comparisons, plot: draw the figures, "
+                             "report: all three")
+    parser.add_argument("-c", "--config", default=DEFAULT_CONFIG, help="experiments config file")
+    parser.add_argument("-e", "--experiments", nargs="+", help="experiments to process (default: all in the config)")
+    parser.add_argument("-w", "--workers", type=int, help="number of worker processes (default: one per log file)")
+    parser.add_argument("--show", action="store_true", help="show every figure before saving it")
+    parser.add_argument("--store", help="read the pod tables from this event_store.py database")
+    parser.add_argument("--force", action="store_true", help="draw every figure, even if its inputs did not change")
+    parser.add_argument("--resamples", type=int, default=RESAMPLES, help="bootstrap resamples of compare")
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE, help="confidence level of compare")
+    parser.add_argument("--stats", metavar="PATH", help="write stage timings and counters as JSON (- for stdout)")
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"],
+                        help="add a profile of the main process to the --stats summary (use -w 1 to include the parsing)")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    experiments = args.experiments or list(config['experiments'])
+    try:
+        for experiment in experiments:
+            experiment_setups(config, experiment)
+    except KeyError as e:
+        parser.error(e.args[0])
+
+    if not args.show:
+        plt.switch_backend("Agg")
+
+    start = time.perf_counter()
+    with instrument.Profiler(args.profile) as profiler:
+        metrics = compute_metrics(config, experiments, args.workers, args.store)
+        if args.command in ("run", "report"):
+            run(config, experiments, metrics)
+        if args.command in ("compare", "report"):
+            compare(config, experiments, metrics, args.workers, args.resamples, args.confidence)
+        if args.command in ("plot", "report"):
+            plot(config, experiments, metrics, args.show, args.workers, args.force)
+    if args.stats:
+        instrument.write_summary(args.stats, instrument.summary(time.perf_counter() - start, profiler))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
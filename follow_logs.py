@@ -0,0 +1,213 @@
+import argparse
+import os
+import time
+from collections import OrderedDict, deque
+
+from bursts import MAX_GAP, deployment_key
+from log_index import SERVICE_PATTERN, parse_log_line
+from metrics_engine import TAIL_COLUMNS, TAIL_METRICS, tail_latencies
+from sketch import QuantileSketch
+
+
+def follow(log_file, poll_interval=0.5, from_start=True):
+    # Yield complete lines as they are appended to the log file, like tail -f.
+    # A partially written line is held back until its newline arrives; a truncated file is read again from the start.
+    with open(log_file, 'r') as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        partial = ""
+        while True:
+            chunk = f.readline()
+            if chunk:
+                partial += chunk
+                if partial.endswith("\n"):
+                    yield partial
+                    partial = ""
+                continue
+            if os.path.getsize(log_file) < f.tell():
+                f.seek(0)
+                partial = ""
+                continue
+            yield None
+            time.sleep(poll_interval)
+
+
+class RunningStats:
+    # Welford's online mean and (population) variance
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self):
+        return (self.m2 / self.count) ** 0.5 if self.count > 0 else 0.0
+
+
+class ServiceMetrics:
+    # Incremental version of get_metrics for one hello-N-instances service.
+    # Only pods that are still waiting for an event and a bounded window of finished pod names are kept in memory.
+    # A pod with its Created event is pending until it is scheduled, however long that takes. A pod seen only through
+    # Scheduled events (its Created line was missed, or it is a late duplicate of a pod that has left the finished
+    # window) is dropped after {orphan_timeout} seconds of log time, like get_metrics leaves it out. {max_pending}
+    # bounds the memory: beyond it the oldest pending pod is dropped.
+
+    def __init__(self, instances, burst_window=5, finished_window=10000, orphan_timeout=60.0, max_pending=100000,
+                 max_gap=MAX_GAP):
+        self.instances = instances
+        self.pending = OrderedDict()
+        self.finished = OrderedDict()
+        self.finished_window = finished_window
+        self.orphan_timeout = orphan_timeout
+        self.max_pending = max_pending
+        self.max_gap = max_gap
+        self.previous_scheduled_time = None
+        self.previous_creation_time = None
+        self.burst_key = None
+        self.completed = 0
+        self.dropped = 0
+        self.startup = RunningStats()
+        self.queue = RunningStats()
+        self.scheduling = RunningStats()
+        self.sketches = {metric: QuantileSketch() for metric in TAIL_METRICS}
+        self.bursts = deque(maxlen=burst_window)
+
+    def add_event(self, timestamp, event_type, pod_name):
+        if pod_name in self.finished:
+            # duplicate Pod Scheduled update of a pod that is already accounted for
+            return
+        pod = self.pending.get(pod_name)
+        if pod is None:
+            pod = self.pending[pod_name] = {'creation': None, 'scheduled': None, 'first_seen': timestamp}
+        if event_type == "Created" and pod['creation'] is None:
+            pod['creation'] = timestamp
+        elif event_type == "Scheduled" and pod['scheduled'] is None:
+            pod['scheduled'] = timestamp
+        self.flush(timestamp)
+
+    def flush(self, now):
+        # Pods are accounted for in order of first appearance, like the pod table of get_metrics
+        while self.pending:
+            pod_name, pod = next(iter(self.pending.items()))
+            if pod['creation'] is not None and pod['scheduled'] is not None:
+                self.add_pod(pod_name, pod['creation'], pod['scheduled'])
+            elif (len(self.pending) > self.max_pending
+                  or (pod['creation'] is None and now - pod['first_seen'] >= self.orphan_timeout)):
+                self.dropped += 1
+            else:
+                break
+            self.finish(pod_name)
+
+    def close(self):
+        # End of the log: account for every pending pod, the ones without both events are left out like in get_metrics
+        while self.pending:
+            pod_name, pod = next(iter(self.pending.items()))
+            if pod['creation'] is not None and pod['scheduled'] is not None:
+                self.add_pod(pod_name, pod['creation'], pod['scheduled'])
+            else:
+                self.dropped += 1
+            self.finish(pod_name)
+
+    def finish(self, pod_name):
+        del self.pending[pod_name]
+        self.finished[pod_name] = None
+        if len(self.finished) > self.finished_window:
+            self.finished.popitem(last=False)
+
+    def add_pod(self, pod_name, creation, scheduled):
+        # same burst detection as bursts.deployment_burst_ids: a new deployment hash or a pause in pod creation
+        key = deployment_key(pod_name)
+        if (not self.bursts or key != self.burst_key
+                or creation - self.previous_creation_time > self.max_gap):
+            self.bursts.append(RunningStats())
+        self.burst_key = key
+        self.previous_creation_time = creation
+        startup_latency = scheduled - creation
+        self.startup.add(startup_latency)
+        self.sketches['start-up time'].add(startup_latency)
+        self.bursts[-1].add(startup_latency)
+        if self.previous_scheduled_time is not None:
+            queue_time = self.previous_scheduled_time - creation if creation < self.previous_scheduled_time else 0
+            self.queue.add(queue_time)
+            self.sketches['queue time'].add(queue_time)
+            self.scheduling.add(startup_latency - queue_time)
+            self.sketches['scheduling latency'].add(startup_latency - queue_time)
+        self.previous_scheduled_time = scheduled
+        self.completed += 1
+
+    def summary(self):
+        summary = {
+            'instances': self.instances,
+            'pods': self.completed,
+            'average start-up time': self.startup.mean,
+            'start-up time std dev': self.startup.std,
+            'average queue time': self.queue.mean,
+            'scheduling latency': self.scheduling.mean,
+            'recent bursts': [(burst.count, burst.mean, burst.std) for burst in self.bursts],
+            'pending': len(self.pending),
+            'dropped': self.dropped,
+        }
+        summary.update(zip(TAIL_COLUMNS, tail_latencies(self.sketches)))
+        return summary
+
+
+def stream_metrics(lines, interval=5.0, **service_options):
+    # Consume log lines (None means no new data yet) and yield a summary of every service at most every {interval} seconds.
+    # When the lines run out (a replay rather than follow), the pending pods are accounted for and a final summary is
+    # yielded, which equals get_metrics on the whole log.
+    services = {}
+    last_emit = time.monotonic()
+    for line in lines:
+        if line is not None and "hello-" in line:
+            timestamp, event_type, pod_name, _ = parse_log_line(line)
+            match = SERVICE_PATTERN.match(pod_name)
+            if match:
+                instances = int(match.group(1))
+                if instances not in services:
+                    services[instances] = ServiceMetrics(instances, **service_options)
+                services[instances].add_event(timestamp, event_type, pod_name)
+        if time.monotonic() - last_emit >= interval:
+            last_emit = time.monotonic()
+            yield [services[instances].summary() for instances in sorted(services)]
+    for service in services.values():
+        service.close()
+    yield [services[instances].summary() for instances in sorted(services)]
+
+
+def print_summaries(summaries):
+    for s in summaries:
+        recent = ", ".join(f"{mean:.4f}" for count, mean, std in s['recent bursts'])
+        print(f"hello-{s['instances']}: {s['pods']} pods, start-up {s['average start-up time']:.4f} "
+              f"(std {s['start-up time std dev']:.4f}), queue {s['average queue time']:.4f}, "
+              f"scheduling latency {s['scheduling latency']:.4f} (p99 {s['scheduling latency p99']:.4f}), recent bursts [{recent}], "
+              f"pending {s['pending']}, dropped {s['dropped']}")
+    print("----------------")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Follow a growing pod event log and report running metrics")
+    parser.add_argument("log_file")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between updates")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds to wait for new lines")
+    parser.add_argument("--from-end", action="store_true", help="only process lines appended from now on")
+    parser.add_argument("--bursts", type=int, default=5, help="number of recent bursts to report")
+    parser.add_argument("--orphan-timeout", type=float, default=60.0,
+                        help="seconds of log time after which a pod seen only through Scheduled events is dropped")
+    parser.add_argument("--max-pending", type=int, default=100000,
+                        help="pending pods kept per service before the oldest is dropped")
+    args = parser.parse_args()
+
+    lines = follow(args.log_file, poll_interval=args.poll, from_start=not args.from_end)
+    try:
+        for summaries in stream_metrics(lines, interval=args.interval, burst_window=args.bursts,
+                                        orphan_timeout=args.orphan_timeout, max_pending=args.max_pending):
+            print_summaries(summaries)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,125 @@
+import cProfile
+import functools
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Stage timers and event counters of the analysis pipeline, per process. Worker processes send their snapshot back
+# with their results (see parallel.py) and the parent merges it, so the summary covers the whole run.
+# Stages nest (index runs parse, metrics runs correlate); a stage's seconds leave out the stages run inside it, so
+# every second is counted for one stage only and the stages add up to the time spent in all of them.
+timers = {}
+counters = {}
+# time spent in the stages nested in each running stage, innermost last
+nested = []
+
+
+def reset():
+    timers.clear()
+    counters.clear()
+    nested.clear()
+
+
+def count(name, n=1):
+    counters[name] = counters.get(name, 0) + n
+
+
+@contextmanager
+def timer(name):
+    start = time.perf_counter()
+    nested.append(0.0)
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        inner = nested.pop()
+        if nested:
+            nested[-1] += elapsed
+        seconds, calls = timers.get(name, (0.0, 0))
+        timers[name] = (seconds + elapsed - inner, calls + 1)
+
+
+def timed(name):
+    # Decorator: time every call of the function under stage {name}
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    return {'timers': dict(timers), 'counters': dict(counters)}
+
+
+def merge(other):
+    for name, (seconds, calls) in other['timers'].items():
+        total_seconds, total_calls = timers.get(name, (0.0, 0))
+        timers[name] = (total_seconds + seconds, total_calls + calls)
+    for name, n in other['counters'].items():
+        count(name, n)
+
+
+class Profiler:
+    # Optional profiling of the parent process around a whole run: 'cprofile' for the functions taking the most
+    # time, 'tracemalloc' for the peak memory and the lines allocating the most
+
+    def __init__(self, mode=None, top=20):
+        self.mode = mode
+        self.top = top
+        self.profile = None
+        self.result = None
+
+    def __enter__(self):
+        if self.mode == "cprofile":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        elif self.mode == "tracemalloc":
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.mode == "cprofile":
+            self.profile.disable()
+            stats = pstats.Stats(self.profile, stream=io.StringIO())
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+            self.result = [{'function': f"{filename}:{line}({function})", 'calls': calls, 'tottime': tottime,
+                            'cumtime': cumtime}
+                           for (filename, line, function), (_, calls, tottime, cumtime, _) in rows]
+        elif self.mode == "tracemalloc":
+            _, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:self.top]
+            tracemalloc.stop()
+            self.result = {'peak_bytes': peak,
+                           'top': [{'line': str(stat.traceback[0]), 'bytes': stat.size, 'blocks': stat.count}
+                                   for stat in top]}
+        return False
+
+
+def summary(wall_time=None, profiler=None):
+    # JSON-ready report: wall time, every stage with its total seconds (without its nested stages) and calls, the
+    # counters and the profile
+    report = {
+        'stages': {name: {'seconds': seconds, 'calls': calls} for name, (seconds, calls) in sorted(timers.items())},
+        'counters': dict(sorted(counters.items())),
+    }
+    if wall_time is not None:
+        report['wall_seconds'] = wall_time
+    if profiler is not None and profiler.result is not None:
+        report[profiler.mode] = profiler.result
+    return report
+
+
+def write_summary(path, report):
+    text = json.dumps(report, indent=2)
+    if path == "-":
+        print(text)
+        return
+    with open(path, 'w') as f:
+        f.write(text + "\n")
+    print(f"Wrote {path}")
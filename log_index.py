@@ -0,0 +1,178 @@
+import json
+import re
+from math import isnan
+
+import instrument
+from event_cache import CachedIndex, load_cache, write_cache
+from log_io import open_log, read_range
+from pod_table import PodTable
+
+# Pod names look like hello-{instances}-instances-{revision}-deployment-{hash}-{suffix}
+SERVICE_PATTERN = re.compile(r"hello-(\d+)-instances-(\d+)-")
+# Event: Pod Created, Pod: {pod}, Namespace: {namespace}, Node: {node}, Timestamp: {epoch seconds}
+LINE_PATTERN = re.compile(r"Event: Pod (\w+), Pod: ([^,]+), Namespace: [^,]*, Node: ([^,]+), Timestamp: ([0-9.]+)")
+
+
+def parse_log_line(line):
+    if line.startswith("{"):
+        # JSON lines, as written by pod-logger/pod_logger.py --format json
+        event = json.loads(line)
+        node_name = event['node'] if event['event'] == "Scheduled" else None
+        return float(event['timestamp']), event['event'], event['pod'], node_name
+    # Extract the event fields with a single regex match; the timestamp stays a float in epoch seconds
+    match = LINE_PATTERN.search(line)
+    event_type, pod_name, node_name, timestamp = match.groups()
+    if event_type != "Scheduled":
+        node_name = None
+    return float(timestamp), event_type, pod_name, node_name
+
+
+def read_events(log_file):
+    # Stream the log file once and yield (instances, revision, event) for every line of a hello-N-instances service.
+    # Compressed logs (.gz, .zst) are decompressed as they are read.
+    with open_log(log_file) as f:
+        for line in f:
+            if "hello-" not in line:
+                continue
+            event = parse_log_line(line)
+            match = SERVICE_PATTERN.match(event[2])
+            if match:
+                yield int(match.group(1)), match.group(2), event
+
+
+def first_events(lines):
+    # Partial index of a block of log lines with only the first Created and the first Scheduled event of every pod,
+    # which is all correlate_pods uses; duplicate Scheduled lines are dropped right away. Pod, node and event type
+    # names are interned, so the events of a pod share one string per name instead of holding a copy each.
+    # Returns the index and the counters of the block, which may have been parsed in another process.
+    index = {}
+    seen = set()
+    names = {}
+    lines_read = 0
+    matched = 0
+    duplicates = 0
+    for line in lines:
+        lines_read += 1
+        if "hello-" not in line:
+            continue
+        matched += 1
+        timestamp, event_type, pod_name, node_name = parse_log_line(line)
+        key = (pod_name, event_type)
+        if key in seen:
+            duplicates += 1
+            continue
+        match = SERVICE_PATTERN.match(pod_name)
+        if match:
+            seen.add(key)
+            event = (timestamp, names.setdefault(event_type, event_type), names.setdefault(pod_name, pod_name),
+                     node_name if node_name is None else names.setdefault(node_name, node_name))
+            index.setdefault(int(match.group(1)), {}).setdefault(match.group(2), []).append(event)
+    return index, {'lines read': lines_read, 'lines matched': matched, 'duplicate events dropped': duplicates}
+
+
+def range_first_events(log_file, start, end):
+    return first_events(read_range(log_file, start, end))
+
+
+def merge_first_events(index, seen, partial):
+    # Append the first_events result of the next block to {index}, dropping events already seen in earlier blocks,
+    # and add the block's counters to the instrument counters.
+    # Merged in file order, correlate_pods gives the same pod tables as on the index of the whole file.
+    partial, counts = partial
+    duplicates = 0
+    for instances, revisions in partial.items():
+        for revision, events in revisions.items():
+            merged = index.setdefault(instances, {}).setdefault(revision, [])
+            for event in events:
+                key = (event[2], event[1])
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                merged.append(event)
+    for name, n in counts.items():
+        instrument.count(name, n)
+    instrument.count("duplicate events dropped", duplicates)
+    return index
+
+
+def index_events(index):
+    # The (instances, revision, event) tuples of an index, service by service and revision by revision
+    for instances, revisions in index.items():
+        for revision, events in revisions.items():
+            for event in events:
+                yield instances, revision, event
+
+
+@instrument.timed("index")
+def index_log(log_file, use_cache=True):
+    # Index a log file: the first Created and Scheduled event of every pod (see first_events), grouped by service
+    # (number of instances) and revision in file order. When the columnar cache next to the log is still up to date
+    # the index is a CachedIndex of its columns instead of a dict; otherwise the cache is written.
+    if use_cache:
+        cache = load_cache(log_file)
+        if cache is not None:
+            instrument.count("cache hits")
+            # the counters of the parse the cache was written from
+            for name, n in cache[1]['counts'].items():
+                instrument.count(name, n)
+            return CachedIndex(*cache)
+    with instrument.timer("parse"), open_log(log_file) as f:
+        index, counts = first_events(f)
+    for name, n in counts.items():
+        instrument.count(name, n)
+    if use_cache:
+        write_cache(log_file, index_events(index), counts)
+    return index
+
+
+def service_instances(index):
+    # The instance counts of the services in an index
+    if isinstance(index, CachedIndex):
+        return index.instances()
+    return sorted(index)
+
+
+def service_events(index, instances):
+    # All events of the hello-{instances}-instances service, revision by revision
+    if isinstance(index, CachedIndex):
+        yield from index.events(instances)
+        return
+    for events in index.get(instances, {}).values():
+        yield from events
+
+
+def service_pods(index, instances):
+    # The pod table of the hello-{instances}-instances service; a cached index builds it straight from its columns
+    if isinstance(index, CachedIndex):
+        return index.pod_table(instances)
+    return correlate_pods(service_events(index, instances))
+
+
+@instrument.timed("correlate")
+def correlate_pods(events):
+    # Build the pod table: the first Created and the first Scheduled event of every pod, in order of first appearance.
+    # The logger emits Pod Scheduled for every status update of a pod, so later duplicates are ignored.
+    # Pod names are only needed here, to give every pod its id in the table.
+    pods = PodTable()
+    ids = {}
+    creation = pods.creation
+    scheduled = pods.scheduled
+    correlated = 0
+    for timestamp, event_type, pod_name, node_name in events:
+        correlated += 1
+        if event_type == "Created":
+            pod = ids.get(pod_name)
+            if pod is None:
+                pod = ids[pod_name] = pods.add_pod(pod_name)
+            if isnan(creation[pod]):
+                creation[pod] = timestamp
+        elif event_type == "Scheduled":
+            pod = ids.get(pod_name)
+            if pod is None:
+                pod = ids[pod_name] = pods.add_pod(pod_name)
+            if isnan(scheduled[pod]):
+                pods.set_scheduled(pod, timestamp, node_name)
+    instrument.count("events correlated", correlated)
+    instrument.count("pods correlated", len(pods))
+    return pods
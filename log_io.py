@@ -0,0 +1,81 @@
+import gzip
+import os
+
+# zstd support is optional: the zstandard package, or compression.zstd from Python 3.14
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+COMPRESSED_SUFFIXES = [".gz", ".zst"]
+
+
+def open_log(log_file, mode='r'):
+    # Open a log as text ('r', 'w' or 'a'), compressing or decompressing on the fly by file extension.
+    # Appending to a .gz or .zst file adds a new gzip member / zstd frame, which readers see as one stream.
+    if log_file.endswith(".gz"):
+        return gzip.open(log_file, mode + 't')
+    if log_file.endswith(".zst"):
+        if zstd is None:
+            raise RuntimeError(f"Reading or writing {log_file} needs the zstandard package")
+        return zstd.open(log_file, mode + 't')
+    return open(log_file, mode)
+
+
+def find_log(path):
+    # The log at {path}, or its compressed version if only that one exists
+    if os.path.exists(path):
+        return path
+    for suffix in COMPRESSED_SUFFIXES:
+        if os.path.exists(path + suffix):
+            return path + suffix
+    return path
+
+
+# Plain logs are split into byte ranges of about this size to be parsed in parallel;
+# compressed logs are decompressed as a stream and handed out in blocks of about this many characters
+CHUNK_SIZE = 64 << 20
+
+
+def is_compressed(log_file):
+    return any(log_file.endswith(suffix) for suffix in COMPRESSED_SUFFIXES)
+
+
+def chunk_ranges(log_file, chunk_size=CHUNK_SIZE):
+    # (start, end) byte ranges covering a plain log, every range ending right after a newline (or at the end)
+    size = os.path.getsize(log_file)
+    ranges = []
+    with open(log_file, 'rb') as f:
+        start = 0
+        while start < size:
+            end = start + chunk_size
+            if end < size:
+                # move the end to the start of the next line
+                f.seek(end - 1)
+                f.readline()
+                end = f.tell()
+            else:
+                end = size
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_range(log_file, start, end):
+    # The lines in a byte range of chunk_ranges
+    with open(log_file, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start).decode().splitlines(keepends=True)
+
+
+def line_blocks(log_file, chunk_size=CHUNK_SIZE):
+    # The lines of a (compressed) log in lists of about {chunk_size} characters, read as a stream
+    with open_log(log_file) as f:
+        while True:
+            lines = f.readlines(chunk_size)
+            if not lines:
+                return
+            yield lines
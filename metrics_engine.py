@@ -0,0 +1,108 @@
+import numpy as np
+
+from bursts import MAX_GAP, deployment_burst_ids
+from sketch import QuantileSketch
+
+PERCENTILES = [50, 90, 95, 99]
+TAIL_METRICS = ['start-up time', 'queue time', 'scheduling latency']
+# extra results columns: p50, p90, p95, p99 and max of every metric
+TAIL_COLUMNS = [f"{metric} {stat}" for metric in TAIL_METRICS for stat in [f"p{p}" for p in PERCENTILES] + ['max']]
+
+
+def pod_columns(pods, max_gap=MAX_GAP):
+    # Turn the pod table (a pod_table.PodTable) into columns for the pods that have both a Created and a
+    # Scheduled event, in pod table order
+    creation = np.array(pods.creation, dtype=np.float64)
+    scheduled = np.array(pods.scheduled, dtype=np.float64)
+    complete = ~np.isnan(creation) & ~np.isnan(scheduled)
+    creation = creation[complete]
+    node = np.array(pods.node, dtype=np.int32)[complete]
+
+    # number the nodes of these pods in order of first appearance
+    used, first = np.unique(node, return_index=True)
+    used = used[np.argsort(first)]
+    node_ids = np.zeros(len(pods.nodes), dtype=np.int32)
+    node_ids[used] = np.arange(len(used), dtype=np.int32)
+    return {
+        'creation_ts': creation,
+        'scheduled_ts': scheduled[complete],
+        'node_id': node_ids[node],
+        'nodes': [pods.nodes[i] for i in used],
+        'run_id': deployment_burst_ids(np.array(pods.deployment)[complete], creation, max_gap),
+    }
+
+
+def startup_times(columns):
+    return columns['scheduled_ts'] - columns['creation_ts']
+
+
+def queue_times(columns):
+    # A pod created before the previous pod was scheduled queues until that pod is scheduled.
+    # The first pod has no predecessor and gets a queue time of 0.
+    creation = columns['creation_ts']
+    scheduled = columns['scheduled_ts']
+    queued = np.zeros(len(creation))
+    if len(creation) > 1:
+        previous_scheduled = scheduled[:-1]
+        queued[1:] = np.where(creation[1:] < previous_scheduled, previous_scheduled - creation[1:], 0)
+    return queued
+
+
+def scheduling_latencies(durations, queued):
+    # Start-up time minus queue time, for every pod that has a predecessor
+    return durations[1:] - queued[1:]
+
+
+def mean(values):
+    return float(values.mean()) if len(values) > 0 else 0
+
+
+def summarize(columns):
+    # average start-up time, start-up time std dev, average queue time, scheduling latency
+    durations = startup_times(columns)
+    queued = queue_times(columns)
+    return (
+        mean(durations),
+        float(durations.std()) if len(durations) > 0 else 0,
+        mean(queued[1:]),
+        mean(scheduling_latencies(durations, queued)),
+    )
+
+
+def metric_sketches(columns):
+    # Quantile sketches of the start-up times, queue times and scheduling latencies, over the same pods as summarize
+    durations = startup_times(columns)
+    queued = queue_times(columns)
+    sketches = {metric: QuantileSketch() for metric in TAIL_METRICS}
+    sketches['start-up time'].add_many(durations)
+    sketches['queue time'].add_many(queued[1:])
+    sketches['scheduling latency'].add_many(scheduling_latencies(durations, queued))
+    return sketches
+
+
+def tail_latencies(sketches):
+    # The TAIL_COLUMNS values of a set of metric sketches
+    values = []
+    for metric in TAIL_METRICS:
+        sketch = sketches[metric]
+        values.extend(sketch.quantile(p / 100) for p in PERCENTILES)
+        values.append(sketch.max if sketch.count > 0 else 0)
+    return tuple(values)
+
+
+def run_means(values, run_id):
+    # Mean of the values of every run; run_id is sorted, so every run is one contiguous slice
+    if len(values) == 0:
+        return np.zeros(0)
+    starts = np.flatnonzero(np.r_[True, run_id[1:] != run_id[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    return np.add.reduceat(values, starts) / counts
+
+
+def run_scheduling_latencies(durations, queued, run_id):
+    # Per-run scheduling latency: the first pod of a run keeps its start-up time, the others subtract the
+    # queue time of the pod before them
+    latencies = durations.copy()
+    same_run = run_id[1:] == run_id[:-1]
+    latencies[1:][same_run] = (durations[1:] - queued[:-1])[same_run]
+    return latencies
@@ -0,0 +1,110 @@
+import numpy as np
+
+from metrics_engine import queue_times, scheduling_latencies, startup_times
+
+NODE_PERCENTILES = [50, 95, 99]
+
+
+def grouped_percentiles(values, groups, group_count, percentiles):
+    # Nearest-rank percentiles of the values of every group, from one lexsort instead of a sort per group
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    counts = np.bincount(groups, minlength=group_count)
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    result = np.zeros((group_count, len(percentiles)))
+    present = counts > 0
+    for i, p in enumerate(percentiles):
+        ranks = starts + np.floor(p / 100 * (counts - 1)).astype(np.int64)
+        result[present, i] = sorted_values[ranks[present]]
+    return result
+
+
+def placement_imbalance(counts):
+    # How unevenly the pods are spread: max/mean - 1 is 0 for a perfectly even placement and grows with skew;
+    # the coefficient of variation describes the spread over all nodes
+    if len(counts) == 0 or counts.sum() == 0:
+        return 0.0, 0.0
+    average = counts.mean()
+    return float(counts.max() / average - 1), float(counts.std() / average)
+
+
+def node_metrics(columns, bucket=1.0, all_nodes=()):
+    # Per-node pod counts, scheduling latency distributions and scheduling throughput over time.
+    # Only nodes that received a pod are known from the events; pass the cluster's nodes as {all_nodes} to
+    # include idle nodes in the counts and the imbalance index.
+    nodes = columns['nodes'] + [node for node in all_nodes if node not in columns['nodes']]
+    node_id = columns['node_id']
+    scheduled = columns['scheduled_ts']
+    node_count = len(nodes)
+    counts = np.bincount(node_id, minlength=node_count)
+
+    # like the scheduling latency of get_metrics, the first pod is left out: its start-up time includes the cold start
+    latencies = scheduling_latencies(startup_times(columns), queue_times(columns))
+    latency_node_id = node_id[1:]
+    latency_counts = np.bincount(latency_node_id, minlength=node_count)
+    sums = np.bincount(latency_node_id, weights=latencies, minlength=node_count)
+    squares = np.bincount(latency_node_id, weights=latencies ** 2, minlength=node_count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(latency_counts > 0, sums / latency_counts, 0)
+        stds = np.sqrt(np.maximum(np.where(latency_counts > 0, squares / latency_counts, 0) - means ** 2, 0))
+    maxima = np.full(node_count, -np.inf)
+    np.maximum.at(maxima, latency_node_id, latencies)
+    maxima[latency_counts == 0] = 0
+
+    # scheduling throughput: pods scheduled on every node per {bucket} seconds, counted with a single bincount
+    if len(scheduled) > 0:
+        start = scheduled.min()
+        bins = ((scheduled - start) // bucket).astype(np.int64)
+        bin_count = int(bins.max()) + 1
+        throughput = np.bincount(node_id * bin_count + bins, minlength=node_count * bin_count)
+        throughput = throughput.reshape(node_count, bin_count) / bucket
+    else:
+        start = 0.0
+        throughput = np.zeros((node_count, 0))
+
+    max_over_mean, variation = placement_imbalance(counts)
+    return {
+        'nodes': nodes,
+        'pods': counts,
+        'share': counts / counts.sum() if counts.sum() > 0 else counts.astype(np.float64),
+        'mean scheduling latency': means,
+        'scheduling latency std dev': stds,
+        'scheduling latency percentiles': grouped_percentiles(latencies, latency_node_id, node_count, NODE_PERCENTILES),
+        'max scheduling latency': maxima,
+        'imbalance': max_over_mean,
+        'coefficient of variation': variation,
+        'throughput start': start,
+        'throughput bucket': bucket,
+        'throughput': throughput,
+    }
+
+
+NODE_HEADER = ["setup", "instances", "node", "pods", "share", "mean scheduling latency", "scheduling latency std dev"] + \
+    [f"scheduling latency p{p}" for p in NODE_PERCENTILES] + \
+    ["max scheduling latency", "peak throughput (pods/s)", "imbalance", "coefficient of variation"]
+
+
+def node_rows(setup, instances, metrics):
+    # One NODE_HEADER row per node
+    rows = []
+    for i, node in enumerate(metrics['nodes']):
+        peak = metrics['throughput'][i].max() if metrics['throughput'].shape[1] > 0 else 0
+        rows.append([setup, instances, node, int(metrics['pods'][i]), float(metrics['share'][i]),
+                     float(metrics['mean scheduling latency'][i]), float(metrics['scheduling latency std dev'][i]),
+                     *metrics['scheduling latency percentiles'][i].tolist(), float(metrics['max scheduling latency'][i]),
+                     float(peak), metrics['imbalance'], metrics['coefficient of variation']])
+    return rows
+
+
+THROUGHPUT_HEADER = ["setup", "instances", "node", "time", "throughput (pods/s)"]
+
+
+def throughput_rows(setup, instances, metrics):
+    # The throughput time series of every node, time in seconds since the first scheduled pod;
+    # buckets without any scheduled pod are left out
+    rows = []
+    bucket = metrics['throughput bucket']
+    for i, node in enumerate(metrics['nodes']):
+        for b in np.flatnonzero(metrics['throughput'][i]).tolist():
+            rows.append([setup, instances, node, b * bucket, float(metrics['throughput'][i, b])])
+    return rows
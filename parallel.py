@@ -0,0 +1,96 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import instrument
+from log_index import first_events, index_log, merge_first_events, range_first_events
+from log_io import CHUNK_SIZE, chunk_ranges, is_compressed, line_blocks
+
+# Logs larger than this, and all compressed logs, are split into chunks that are parsed in parallel instead of being
+# indexed (and cached) whole by a single worker
+LARGE_LOG = 1 << 30
+
+
+def is_large(log_file):
+    return is_compressed(log_file) or os.path.getsize(log_file) > LARGE_LOG
+
+
+def pod_index(log_file, workers=None, chunk_size=CHUNK_SIZE):
+    # An index of the first Created and Scheduled event of every pod, enough for correlate_pods, built by parsing
+    # chunks of the log in parallel and merging their partial indexes in file order. Plain logs are split into
+    # newline-aligned byte ranges, compressed logs are decompressed as a stream in the parent. At most two chunks
+    # per worker are in flight, so memory depends on the chunk size and the number of pods, not the file size.
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if is_compressed(log_file):
+        tasks = ((first_events, lines) for lines in line_blocks(log_file, chunk_size))
+    else:
+        tasks = ((range_first_events, log_file, start, end) for start, end in chunk_ranges(log_file, chunk_size))
+
+    index = {}
+    seen = set()
+    with instrument.timer("parse"):
+        chunks = parse_chunks(tasks, index, seen, workers)
+    instrument.count("chunks parsed", chunks)
+    return index
+
+
+def parse_chunks(tasks, index, seen, workers):
+    # Run the chunk tasks, in a process pool for more than one worker, and merge their results into {index} in order
+    chunks = 0
+    if workers <= 1:
+        for func, *args in tasks:
+            merge_first_events(index, seen, func(*args))
+            chunks += 1
+        return chunks
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for func, *args in tasks:
+            pending.append(pool.submit(func, *args))
+            if len(pending) >= 2 * workers:
+                merge_first_events(index, seen, pending.popleft().result())
+                chunks += 1
+        while pending:
+            merge_first_events(index, seen, pending.popleft().result())
+            chunks += 1
+    return chunks
+
+
+def file_metrics(get_metrics, log_file, instances, index=None):
+    # Index one log file and compute get_metrics for each of its instance counts.
+    # Only the metric results travel back to the parent process, never the index or the pod tables.
+    if index is None:
+        index = index_log(log_file)
+    return [get_metrics(index, instance) for instance in instances]
+
+
+def worker_file_metrics(get_metrics, log_file, instances):
+    # file_metrics in a worker process, returning the worker's instrument counters and timers with the results
+    instrument.reset()
+    return file_metrics(get_metrics, log_file, instances), instrument.snapshot()
+
+
+def sweep(get_metrics, jobs, workers=None):
+    # jobs is a list of (log_file, instances) pairs; every log file is handled by one worker so it is read only once.
+    # Large logs are instead chunked over all workers one after the other, see pod_index.
+    # The results are returned in job order, whatever order the workers finish in.
+    jobs = list(jobs)
+    large = [is_large(log_file) for log_file, _ in jobs]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    results = [None] * len(jobs)
+    for i, (log_file, instances) in enumerate(jobs):
+        if large[i]:
+            results[i] = file_metrics(get_metrics, log_file, instances, pod_index(log_file, workers))
+
+    small = [i for i in range(len(jobs)) if not large[i]]
+    if workers <= 1 or len(small) <= 1:
+        for i in small:
+            results[i] = file_metrics(get_metrics, *jobs[i])
+        return results
+    with ProcessPoolExecutor(max_workers=min(workers, len(small))) as pool:
+        futures = {i: pool.submit(worker_file_metrics, get_metrics, *jobs[i]) for i in small}
+        for i, future in futures.items():
+            results[i], stats = future.result()
+            instrument.merge(stats)
+    return results
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import time
+from datetime import datetime, timezone
+
+from kubernetes_asyncio import client, config, watch
+from kubernetes_asyncio.client.exceptions import ApiException
+
+
+def format_text(event):
+    # The format the analysis scripts parse:
+    # 2024-06-15 12:06:29.267 Event: Pod Created, Pod: hello-1-..., Namespace: default, Node: None, Timestamp: 1718453189.2679682
+    timestamp, event_type, pod_name, namespace, node_name = event
+    prefix = datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+    return (f"{prefix} Event: Pod {event_type}, Pod: {pod_name}, Namespace: {namespace}, "
+            f"Node: {node_name}, Timestamp: {timestamp}\n")
+
+
+def format_json(event):
+    timestamp, event_type, pod_name, namespace, node_name = event
+    return json.dumps({'event': event_type, 'pod': pod_name, 'namespace': namespace, 'node': node_name,
+                       'timestamp': timestamp}) + "\n"
+
+
+FORMATS = {'text': format_text, 'json': format_json}
+
+
+def is_scheduled(pod):
+    if pod.spec.node_name:
+        return True
+    for condition in pod.status.conditions or []:
+        if condition.type == "PodScheduled" and condition.status == "True":
+            return True
+    return False
+
+
+class PodEventLogger:
+    # Watches the pods of a namespace (or all namespaces) and logs one Created event per new pod and one
+    # Scheduled event per pod once it has been bound to a node. The API server sends a MODIFIED event for every
+    # status update of a pod; only the first one after scheduling is logged. The uids of the pods logged as
+    # Created are kept until the pod is deleted, so a relist can tell the pods it has not seen yet.
+
+    def __init__(self, namespace, out, formatter, batch_size=512, flush_interval=0.2, keep_duplicates=False):
+        self.namespace = namespace
+        self.out = out
+        self.formatter = formatter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.keep_duplicates = keep_duplicates
+        self.queue = asyncio.Queue()
+        self.known = set()
+        self.scheduled = set()
+        self.resource_version = None
+
+    def handle(self, event_type, pod):
+        # Runs in the watch loop: stamp the event right away and hand it to the writer, no I/O here
+        now = time.time()
+        uid = pod.metadata.uid
+        if event_type == "DELETED":
+            self.known.discard(uid)
+            self.scheduled.discard(uid)
+            return
+        if event_type == "ADDED":
+            self.known.add(uid)
+            self.queue.put_nowait((now, "Created", pod.metadata.name, pod.metadata.namespace, pod.spec.node_name))
+        if is_scheduled(pod) and (self.keep_duplicates or uid not in self.scheduled):
+            self.scheduled.add(uid)
+            self.queue.put_nowait((now, "Scheduled", pod.metadata.name, pod.metadata.namespace, pod.spec.node_name))
+
+    def list_function(self, v1):
+        if self.namespace:
+            return v1.list_namespaced_pod, [self.namespace]
+        return v1.list_pod_for_all_namespaces, []
+
+    def relist(self, pods):
+        # Catch up with a full list: pods that are new are logged as Created (and Scheduled if already bound), known
+        # pods that were bound in the meantime as Scheduled, and pods that are gone are forgotten. On the first list
+        # every pod is new.
+        uids = set()
+        for pod in pods:
+            uids.add(pod.metadata.uid)
+            if pod.metadata.uid not in self.known:
+                self.handle("ADDED", pod)
+            elif is_scheduled(pod) and pod.metadata.uid not in self.scheduled:
+                self.handle("MODIFIED", pod)
+        self.known &= uids
+        self.scheduled &= uids
+
+    async def watch_pods(self, v1):
+        # Informer loop: list to learn the current resource version, then watch from there. After an expired
+        # resource version (410 Gone) the list is repeated and the events missed in between are made up for.
+        list_pods, args = self.list_function(v1)
+        while True:
+            if self.resource_version is None:
+                pods = await list_pods(*args)
+                self.resource_version = pods.metadata.resource_version
+                self.relist(pods.items)
+            w = watch.Watch()
+            try:
+                async for event in w.stream(list_pods, *args, resource_version=self.resource_version, timeout_seconds=300):
+                    pod = event['object']
+                    self.resource_version = pod.metadata.resource_version
+                    self.handle(event['type'], pod)
+            except ApiException as e:
+                if e.status != 410:
+                    raise
+                self.resource_version = None
+            finally:
+                w.stop()
+
+    def write_batch(self, batch):
+        if batch:
+            self.out.write("".join(self.formatter(event) for event in batch))
+            self.out.flush()
+
+    async def write_events(self):
+        # Collect events for up to {flush_interval} seconds or {batch_size} events and write them in one go.
+        # A None in the queue (see run) stops the writer once the events queued before it are written.
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            if batch[-1] is None:
+                self.write_batch(batch[:-1])
+                return
+            self.write_batch(batch)
+
+    async def run(self):
+        # Watch and write until the watch fails, the writer fails (e.g. the disk is full) or SIGTERM arrives. On the
+        # way out the watch is stopped first and the writer then writes every event still queued.
+        try:
+            config.load_incluster_config()
+        except config.ConfigException:
+            await config.load_kube_config()
+        stop = asyncio.Event()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # no signal handlers on Windows or outside the main thread
+            pass
+        async with client.ApiClient() as api:
+            v1 = client.CoreV1Api(api)
+            watcher = asyncio.create_task(self.watch_pods(v1))
+            writer = asyncio.create_task(self.write_events())
+            stopper = asyncio.create_task(stop.wait())
+            try:
+                done, _ = await asyncio.wait([watcher, writer, stopper], return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+            finally:
+                watcher.cancel()
+                stopper.cancel()
+                await asyncio.gather(watcher, stopper, return_exceptions=True)
+                if not writer.done():
+                    self.queue.put_nowait(None)
+                # raises the error of a failed writer
+                await writer
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Log pod Created and Scheduled events")
+    parser.add_argument("--namespace", default=None, help="namespace to watch (default: all namespaces)")
+    parser.add_argument("--format", choices=list(FORMATS), default="text", help="output format")
+    parser.add_argument("--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=512, help="maximum number of events per write")
+    parser.add_argument("--flush-interval", type=float, default=0.2, help="maximum seconds an event waits to be written")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="log a Scheduled event for every update of a scheduled pod, like the old logger")
+    args = parser.parse_args()
+
+    out = sys.stdout if args.output == "-" else open(args.output, 'a', buffering=1 << 20)
+    logger = PodEventLogger(args.namespace, out, FORMATS[args.format], args.batch_size, args.flush_interval,
+                            args.keep_duplicates)
+    try:
+        asyncio.run(logger.run())
+    except KeyboardInterrupt:
+        pass
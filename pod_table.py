@@ -0,0 +1,72 @@
+import math
+from array import array
+
+from bursts import deployment_key
+
+
+class PodTable:
+    # The pod table of one service in columns: the first Created and the first Scheduled timestamp of every pod
+    # (NaN until seen), its node and its deployment, in order of first appearance. A pod is identified by its row;
+    # node names and deployments are interned and stored as small ints, pod names are not kept at all.
+    # This takes about 25 bytes per pod, against about 220 for a dict of dicts keyed by pod name.
+
+    __slots__ = ('creation', 'scheduled', 'node', 'deployment', 'nodes', 'node_ids', 'deployments', 'deployment_ids',
+                 'prefix_ids')
+
+    def __init__(self):
+        self.creation = array('d')
+        self.scheduled = array('d')
+        # -1 until the pod is scheduled
+        self.node = array('i')
+        self.deployment = array('i')
+        self.nodes = []
+        self.node_ids = {}
+        self.deployments = []
+        self.deployment_ids = {}
+        # pod name without its random suffix -> deployment id, so the name is only matched once per ReplicaSet
+        self.prefix_ids = {}
+
+    @classmethod
+    def from_columns(cls, creation, scheduled, node, nodes, deployment, deployments):
+        # A table from complete columns (contiguous float64 and int32 arrays, e.g. numpy ones), as
+        # event_cache.CachedIndex builds them, instead of pod by pod
+        pods = cls()
+        pods.creation.frombytes(memoryview(creation).cast('B'))
+        pods.scheduled.frombytes(memoryview(scheduled).cast('B'))
+        pods.node.frombytes(memoryview(node).cast('B'))
+        pods.deployment.frombytes(memoryview(deployment).cast('B'))
+        pods.nodes = list(nodes)
+        pods.node_ids = {name: i for i, name in enumerate(pods.nodes)}
+        pods.deployments = list(deployments)
+        pods.deployment_ids = {key: i for i, key in enumerate(pods.deployments)}
+        return pods
+
+    def __len__(self):
+        return len(self.creation)
+
+    def add_pod(self, pod_name):
+        # Add a pod without events and return its id
+        prefix = pod_name.rpartition("-")[0]
+        deployment = self.prefix_ids.get(prefix)
+        if deployment is None:
+            key = deployment_key(pod_name)
+            deployment = self.deployment_ids.get(key)
+            if deployment is None:
+                deployment = self.deployment_ids[key] = len(self.deployments)
+                self.deployments.append(key)
+            self.prefix_ids[prefix] = deployment
+        self.creation.append(math.nan)
+        self.scheduled.append(math.nan)
+        self.node.append(-1)
+        self.deployment.append(deployment)
+        return len(self.creation) - 1
+
+    def set_scheduled(self, pod, timestamp, node_name):
+        # Only the first Scheduled event of a pod counts, later ones are status updates
+        if math.isnan(self.scheduled[pod]):
+            self.scheduled[pod] = timestamp
+            node = self.node_ids.get(node_name)
+            if node is None:
+                node = self.node_ids[node_name] = len(self.nodes)
+                self.nodes.append(node_name)
+            self.node[pod] = node
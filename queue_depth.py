@@ -0,0 +1,54 @@
+import numpy as np
+
+
+def queue_depth(columns):
+    # Sweep over all Created (+1) and Scheduled (-1) events in time order: the running sum is the number of pods
+    # waiting to be scheduled after every event. At equal timestamps the Scheduled event is taken first.
+    creation = columns['creation_ts']
+    scheduled = columns['scheduled_ts']
+    times = np.concatenate([creation, scheduled])
+    deltas = np.concatenate([np.ones(len(creation), dtype=np.int64), -np.ones(len(scheduled), dtype=np.int64)])
+    order = np.lexsort((deltas, times))
+    return times[order], np.cumsum(deltas[order])
+
+
+def queue_depth_series(columns, bucket=0.1):
+    # Pending queue depth and scheduling throughput per {bucket} seconds, time relative to the first Created event.
+    # 'max depth' is the deepest the queue got in a bucket, 'depth' how deep it was at the end of the bucket.
+    times, depth = queue_depth(columns)
+    if len(times) == 0:
+        empty = np.zeros(0)
+        return {'time': empty, 'depth': empty, 'max depth': empty, 'throughput': empty, 'bucket': bucket}
+    start = times[0]
+    bins = ((times - start) // bucket).astype(np.int64)
+    bucket_count = int(bins[-1]) + 1
+
+    # depth at the end of every bucket: the depth after the last event up to that bucket, 0 before any event
+    last_event = np.searchsorted(bins, np.arange(bucket_count), side='right') - 1
+    end_depth = np.where(last_event >= 0, depth[np.maximum(last_event, 0)], 0)
+
+    # a bucket starts at the depth the previous one ended with and can only get deeper through its own events
+    max_depth = np.r_[0, end_depth[:-1]]
+    np.maximum.at(max_depth, bins, depth)
+
+    scheduled_bins = ((columns['scheduled_ts'] - start) // bucket).astype(np.int64)
+    throughput = np.bincount(scheduled_bins, minlength=bucket_count) / bucket
+
+    return {
+        'time': np.arange(bucket_count) * bucket,
+        'depth': end_depth,
+        'max depth': max_depth,
+        'throughput': throughput,
+        'bucket': bucket,
+    }
+
+
+def burst_queue_depth_series(columns, bucket=0.1):
+    # queue_depth_series of every burst on its own, so the time axis of each starts at its first Created event
+    series = []
+    run_id = columns['run_id']
+    for run in np.unique(run_id):
+        selected = run_id == run
+        series.append(queue_depth_series({'creation_ts': columns['creation_ts'][selected],
+                                          'scheduled_ts': columns['scheduled_ts'][selected]}, bucket))
+    return series
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import instrument
+from boxplot import plot_box_stats
+from graph import plot_average_start_up_time, plot_performance_metrics, plot_queue_depth, use_style
+
+# Bump when a drawing function changes, so every figure is drawn again
+RENDER_VERSION = 1
+
+
+def draw_figure(kind, args):
+    # Draw one figure: kind names the plotting function, args are its (picklable) inputs
+    if kind == "boxplot":
+        return plot_box_stats(*args)
+    with plt.style.context('default'):
+        use_style()
+        if kind == "average_start_up_time":
+            rows, columns, labels = args
+            return plot_average_start_up_time(pd.DataFrame(rows, columns=columns), labels)
+        if kind == "performance_metrics":
+            rows, columns, labels = args
+            return plot_performance_metrics(pd.DataFrame(rows, columns=columns), labels)
+        if kind == "queue_depth":
+            return plot_queue_depth(*args)
+    raise ValueError(f"Unknown figure kind: {kind}")
+
+
+def figure_hash(kind, args):
+    # Content hash of everything a figure is drawn from
+    digest = hashlib.sha256(pickle.dumps((RENDER_VERSION, matplotlib.__version__, kind, args), protocol=4))
+    return digest.hexdigest()
+
+
+def render_figure(path, kind, args):
+    plt.switch_backend("Agg")
+    fig = draw_figure(kind, args)
+    fig.savefig(path)
+    plt.close(fig)
+    return path
+
+
+def manifest_path(images_dir):
+    return os.path.join(images_dir, ".render_hashes.json")
+
+
+def load_manifest(images_dir):
+    try:
+        with open(manifest_path(images_dir), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def render(figures, images_dir, workers=None, force=False):
+    # Headless rendering stage: figures is a list of (path, kind, args). Figures whose inputs hash the same as when
+    # they were last written are skipped, the others are drawn with the Agg backend in parallel processes.
+    manifest = load_manifest(images_dir)
+    todo = []
+    for path, kind, args in figures:
+        digest = figure_hash(kind, args)
+        if not force and manifest.get(path) == digest and os.path.exists(path):
+            print(f"Unchanged {path}")
+            instrument.count("figures skipped")
+            continue
+        todo.append((path, kind, args, digest))
+
+    instrument.count("figures drawn", len(todo))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(todo) <= 1:
+        results = [render_figure(path, kind, args) for path, kind, args, _ in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            futures = [pool.submit(render_figure, path, kind, args) for path, kind, args, _ in todo]
+            results = [future.result() for future in futures]
+
+    for (path, _, _, digest), written in zip(todo, results):
+        manifest[path] = digest
+        print(f"Wrote {written}")
+    os.makedirs(images_dir, exist_ok=True)
+    with open(manifest_path(images_dir), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return [path for path, _, _, _ in todo]
@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+
+
+class QuantileSketch:
+    # DDSketch-style quantile sketch: values are counted in logarithmically sized buckets, so any quantile is
+    # estimated within {relative_accuracy} of the true value while memory only grows with the logarithm of the
+    # value range. Sketches with the same accuracy can be merged, e.g. the sketches of different workers or chunks.
+
+    # magnitudes below this are counted as zero
+    min_value = 1e-9
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def key(self, magnitude):
+        return math.ceil(math.log(magnitude) / self.log_gamma)
+
+    def add(self, value):
+        if value > self.min_value:
+            store = self.positive
+        elif value < -self.min_value:
+            store = self.negative
+        else:
+            store = None
+        if store is None:
+            self.zero_count += 1
+        else:
+            k = self.key(abs(value))
+            store[k] = store.get(k, 0) + 1
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def add_many(self, values):
+        # Vectorized add for a NumPy array of values
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        for store, selected in [(self.positive, values[values > self.min_value]),
+                                (self.negative, -values[values < -self.min_value])]:
+            if len(selected) == 0:
+                continue
+            keys, counts = np.unique(np.ceil(np.log(selected) / self.log_gamma).astype(np.int64), return_counts=True)
+            for k, c in zip(keys.tolist(), counts.tolist()):
+                store[k] = store.get(k, 0) + c
+        self.zero_count += int(np.count_nonzero(np.abs(values) <= self.min_value))
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with a different relative accuracy")
+        for store, other_store in [(self.positive, other.positive), (self.negative, other.negative)]:
+            for k, c in other_store.items():
+                store[k] = store.get(k, 0) + c
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def bucket_value(self, k):
+        # the value in the middle of bucket k in terms of relative error
+        return 2 * self.gamma ** k / (self.gamma + 1)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return 0
+        rank = q * (self.count - 1)
+        seen = 0
+        # walk the buckets from the most negative to the most positive value
+        for k in sorted(self.negative, reverse=True):
+            seen += self.negative[k]
+            if seen > rank:
+                return max(self.min, -self.bucket_value(k))
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.positive):
+            seen += self.positive[k]
+            if seen > rank:
+                return min(self.max, self.bucket_value(k))
+        return self.max
@@ -0,0 +1,172 @@
+import argparse
+import string
+import sys
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import numpy as np
+
+from log_index import index_log, parse_log_line, read_events, service_pods
+from metrics_engine import pod_columns
+
+# Fitted from log-outputs/pod_event_logs_base-1-100.txt with fit_parameters
+DEFAULT_PARAMETERS = {
+    # mean time between two Created events of a burst (exponential)
+    'creation_gap': 0.0333,
+    # scheduler service time per pod (lognormal, parameters of the underlying normal)
+    'service_mu': -4.242,
+    'service_sigma': 1.013,
+    # Pod Scheduled lines per pod after the first one (Poisson), and their mean delay after scheduling (exponential)
+    'duplicates': 7.21,
+    'duplicate_delay': 1.0,
+}
+
+
+def fit_parameters(log_files, instances=(1, 5, 10, 25, 50, 100)):
+    # Fit the generator parameters to real logs, treating the scheduler as a single server queue:
+    # a pod's service starts when it is created or when the previous pod is scheduled, whichever is later
+    gaps = []
+    services = []
+    scheduled_lines = 0
+    pods = 0
+    for log_file in log_files:
+        # the index keeps only the first Scheduled event of a pod, the duplicates are counted on the raw events
+        scheduled_lines += sum(1 for instance, _, event in read_events(log_file)
+                               if instance in instances and event[1] == "Scheduled")
+        index = index_log(log_file)
+        for instance in instances:
+            columns = pod_columns(service_pods(index, instance))
+            pods += len(columns['creation_ts'])
+            same_burst = columns['run_id'][1:] == columns['run_id'][:-1]
+            creation = columns['creation_ts']
+            scheduled = columns['scheduled_ts']
+            gaps.append(np.diff(creation)[same_burst])
+            services.append((scheduled[1:] - np.maximum(creation[1:], scheduled[:-1]))[same_burst])
+    gaps = np.concatenate(gaps)
+    services = np.concatenate(services)
+    services = services[services > 0]
+    return {
+        'creation_gap': float(gaps.mean()),
+        'service_mu': float(np.log(services).mean()),
+        'service_sigma': float(np.log(services).std()),
+        'duplicates': scheduled_lines / pods - 1 if pods > 0 else 0,
+        'duplicate_delay': DEFAULT_PARAMETERS['duplicate_delay'],
+    }
+
+
+@lru_cache(maxsize=1024)
+def second_prefix(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def format_line(timestamp, event_type, pod_name, node_name):
+    # Same format as pod-logger/pod_logger.py; the date is formatted once per second of log. The fraction is rounded
+    # to microseconds and then truncated to milliseconds like datetime.fromtimestamp(...).strftime('%f')[:-3], a
+    # fraction rounding up to a whole second carrying into the seconds.
+    seconds = int(timestamp)
+    microseconds = round((timestamp - seconds) * 1e6)
+    if microseconds >= 1000000:
+        seconds += 1
+        microseconds -= 1000000
+    return (f"{second_prefix(seconds)}.{microseconds // 1000:03d} Event: Pod {event_type}, Pod: {pod_name}, Namespace: default, "
+            f"Node: {node_name}, Timestamp: {timestamp}\n")
+
+
+def random_suffix(rng, alphabet, length, count):
+    letters = np.array(list(alphabet))
+    return ["".join(row) for row in letters[rng.integers(0, len(letters), size=(count, length))]]
+
+
+def generate_burst(rng, size, start, nodes, parameters):
+    # Lines of one burst of {size} pods, sorted by timestamp like the logger writes them, and the last timestamp
+    creation = start + np.cumsum(np.r_[0, rng.exponential(parameters['creation_gap'], size - 1)])
+    service = rng.lognormal(parameters['service_mu'], parameters['service_sigma'], size)
+    # single server queue, scheduled[i] = max(creation[i], scheduled[i - 1]) + service[i], solved with cumulative sums:
+    # scheduled[i] = total_service[i] + max over j <= i of (creation[j] - total_service[j - 1])
+    total_service = np.cumsum(service)
+    scheduled = total_service + np.maximum.accumulate(creation - (total_service - service))
+    node = rng.integers(0, len(nodes), size)
+
+    deployment = "".join(random_suffix(rng, "0123456789abcdef", 10, 1))
+    names = [f"hello-{size}-instances-00001-deployment-{deployment}-{suffix}"
+             for suffix in random_suffix(rng, string.ascii_lowercase + string.digits, 5, size)]
+
+    duplicates = rng.poisson(parameters['duplicates'], size)
+    duplicate_pod = np.repeat(np.arange(size), duplicates)
+    duplicate_time = scheduled[duplicate_pod] + rng.exponential(parameters['duplicate_delay'], len(duplicate_pod))
+
+    # (timestamp, kind, pod): kind 0 is Created, 1 is Scheduled
+    times = np.concatenate([creation, scheduled, duplicate_time])
+    kinds = np.concatenate([np.zeros(size, dtype=np.int8), np.ones(size + len(duplicate_pod), dtype=np.int8)])
+    pods = np.concatenate([np.arange(size), np.arange(size), duplicate_pod])
+    order = np.lexsort((kinds, times))
+    lines = [format_line(t, "Created", names[pod], None) if kind == 0 else
+             format_line(t, "Scheduled", names[pod], nodes[node[pod]])
+             for t, kind, pod in zip(times[order].tolist(), kinds[order].tolist(), pods[order].tolist())]
+    return lines, float(times.max())
+
+
+def generate(sizes, repetitions, nodes=3, burst_gap=50.0, start=None, parameters=DEFAULT_PARAMETERS, seed=None):
+    # Lines of a synthetic pod_event_logs file: {repetitions} bursts of every size in {sizes}, like the experiments.
+    # Bursts are generated one at a time, so memory only depends on the largest burst.
+    rng = np.random.default_rng(seed)
+    node_names = [f"minikube-m{i + 2:02d}" for i in range(nodes)]
+    t = time.time() if start is None else start
+    for size in sizes:
+        for _ in range(repetitions):
+            lines, end = generate_burst(rng, size, t, node_names, parameters)
+            yield from lines
+            t = end + burst_gap
+
+
+def replay(lines, out, speed=1.0):
+    # Write log lines to {out} at the pace of their timestamps, {speed} times faster than real time
+    # (0 writes as fast as possible), to feed follow_logs.py or fetch tests without a cluster
+    first_timestamp = None
+    started = time.monotonic()
+    for line in lines:
+        if speed > 0:
+            timestamp = parse_log_line(line)[0]
+            if first_timestamp is None:
+                first_timestamp = timestamp
+            delay = (timestamp - first_timestamp) / speed - (time.monotonic() - started)
+            if delay > 0:
+                out.flush()
+                time.sleep(delay)
+        out.write(line)
+    out.flush()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate or replay pod event logs in the pod-logger format")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser("generate", help="write a synthetic log")
+    generate_parser.add_argument("output", help="output file, - for stdout")
+    generate_parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 25, 50, 100], help="burst sizes")
+    generate_parser.add_argument("--repetitions", type=int, default=5, help="bursts per size")
+    generate_parser.add_argument("--nodes", type=int, default=3, help="number of worker nodes")
+    generate_parser.add_argument("--burst-gap", type=float, default=50.0, help="seconds between bursts")
+    generate_parser.add_argument("--duplicates", type=float, help="mean duplicate Pod Scheduled lines per pod")
+    generate_parser.add_argument("--fit", nargs="+", metavar="LOG", help="fit the latency distributions to these logs")
+    generate_parser.add_argument("--seed", type=int, help="random seed")
+
+    replay_parser = subparsers.add_parser("replay", help="replay a log into another file at (accelerated) real time")
+    replay_parser.add_argument("input")
+    replay_parser.add_argument("output", help="output file, appended to, - for stdout")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="speed-up factor, 0 for no delays")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        parameters = fit_parameters(args.fit) if args.fit else dict(DEFAULT_PARAMETERS)
+        if args.duplicates is not None:
+            parameters['duplicates'] = args.duplicates
+        lines = generate(args.sizes, args.repetitions, args.nodes, args.burst_gap, parameters=parameters, seed=args.seed)
+        out = sys.stdout if args.output == "-" else open(args.output, 'w')
+        out.writelines(lines)
+        out.close()
+    else:
+        out = sys.stdout if args.output == "-" else open(args.output, 'a')
+        with open(args.input, 'r') as f:
+            replay(f, out, args.speed)
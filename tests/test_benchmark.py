@@ -0,0 +1,40 @@
+import json
+import os
+import tempfile
+
+from benchmark import bundled_logs, compare, report_benchmark
+
+
+def write_history(path, records):
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def record(commit, seconds, peak_bytes=1000):
+    return {'commit': commit, 'benchmark': "index", 'input': "bundled", 'seconds': seconds, 'peak_bytes': peak_bytes}
+
+
+def test_compare_single_commit_succeeds(tmp_path, capsys):
+    history = str(tmp_path / "history.jsonl")
+    write_history(history, [record("aaa", 1.0)])
+    assert compare(history)
+    assert "nothing to compare" in capsys.readouterr().out
+
+
+def test_compare_flags_regressions(tmp_path, capsys):
+    history = str(tmp_path / "history.jsonl")
+    write_history(history, [record("aaa", 1.0), record("bbb", 1.05)])
+    assert compare(history)
+    write_history(history, [record("aaa", 1.0), record("bbb", 1.0, 2000)])
+    assert not compare(history)
+    assert "REGRESSION: memory +100%" in capsys.readouterr().out
+
+
+def test_report_removes_its_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    report, items = report_benchmark(bundled_logs()[:1])
+    report()
+    report()
+    assert items == 1
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from bootstrap import bootstrap_difference, compare_samples, metric_sample, resampling_units
+
+
+def test_resampling_units_are_runs():
+    sums, counts = resampling_units([1.0, 2.0, 3.0, 4.0, 5.0], [7, 7, 3, 3, 3])
+    assert sums.tolist() == [12.0, 3.0]
+    assert counts.tolist() == [3.0, 2.0]
+
+
+def test_metric_sample_drops_first_run_id_with_first_pod():
+    metrics = {'startup': np.array([1.0, 2.0, 3.0]), 'queue': np.array([0.5, 0.6]), 'run_id': np.array([0, 0, 1])}
+    assert metric_sample(metrics, 'startup')[1].tolist() == [0, 0, 1]
+    assert metric_sample(metrics, 'queue')[1].tolist() == [0, 1]
+
+
+def test_correlated_pods_widen_the_interval():
+    # 10 runs of 100 pods each with the same value: 10 independent draws, not 1000
+    rng = np.random.default_rng(1)
+    a = np.repeat(rng.normal(0, 1, 10), 100)
+    b = np.repeat(rng.normal(0, 1, 10), 100)
+    runs = np.repeat(np.arange(10), 100)
+    pods = np.arange(1000)
+    low, high, _ = bootstrap_difference(resampling_units(a, runs), resampling_units(b, runs), seed=0)
+    pod_low, pod_high, _ = bootstrap_difference(resampling_units(a, pods), resampling_units(b, pods), seed=0)
+    assert high - low > 5 * (pod_high - pod_low)
+
+
+def test_p_value():
+    rng = np.random.default_rng(2)
+    runs = np.repeat(np.arange(20), 5)
+    a = rng.normal(0, 1, 100)
+    _, _, same = bootstrap_difference(resampling_units(a, runs), resampling_units(a, runs), seed=0)
+    _, _, shifted = bootstrap_difference(resampling_units(a, runs), resampling_units(a + 10, runs), seed=0)
+    assert same > 0.5
+    assert shifted < 0.01
+
+
+def test_compare_samples_does_not_depend_on_workers():
+    rng = np.random.default_rng(3)
+    runs = np.repeat(np.arange(10), 10)
+    pairs = [((rng.normal(0, 1, 100), runs), (rng.normal(i, 1, 100), runs)) for i in range(3)]
+    pairs.append(((np.array([]), np.array([])), pairs[0][1]))
+    serial = compare_samples(pairs, resamples=200, workers=1)
+    assert serial[:3] == compare_samples(pairs, resamples=200, workers=2)[:3]
+    assert serial[1][2] == pytest.approx(np.mean(pairs[1][1][0]) - np.mean(pairs[1][0][0]))
+    assert np.isnan(serial[3][0]) and np.isnan(serial[3][3])
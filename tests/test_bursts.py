@@ -0,0 +1,32 @@
+import numpy as np
+
+from bursts import deployment_burst_ids, deployment_key
+from log_index import correlate_pods
+from metrics_engine import pod_columns, run_means
+
+
+def test_deployment_key():
+    assert deployment_key("hello-5-instances-00002-deployment-5c5c948c66-x7k2p") == ("00002", "5c5c948c66")
+    assert deployment_key("pod-event-logger-7d9f") is None
+
+
+def test_new_deployment_or_gap_starts_a_burst():
+    key_ids = np.array([0, 0, 0, 1, 1, 1, 1])
+    creation = np.array([0.0, 1.0, 2.0, 3.0, 4.0, 20.0, 21.0])
+    assert deployment_burst_ids(key_ids, creation).tolist() == [0, 0, 0, 1, 1, 2, 2]
+    assert deployment_burst_ids(key_ids, creation, max_gap=30.0).tolist() == [0, 0, 0, 1, 1, 1, 1]
+    assert deployment_burst_ids(np.zeros(0, dtype=np.int64), np.zeros(0)).tolist() == []
+
+
+def test_bursts_of_a_service():
+    # two repetitions of a 2-pod burst, told apart by their ReplicaSet hash although they are close in time
+    events = []
+    for t, deployment in [(0.0, "aaaa"), (1.0, "bbbb")]:
+        for i in range(2):
+            pod = f"hello-2-instances-00001-deployment-{deployment}-p{i}"
+            events.append((t + 0.1 * i, "Created", pod, None))
+            events.append((t + 0.1 * i + 0.05 * (i + 1), "Scheduled", pod, "node-1"))
+    columns = pod_columns(correlate_pods(events))
+    assert columns['run_id'].tolist() == [0, 0, 1, 1]
+    durations = columns['scheduled_ts'] - columns['creation_ts']
+    assert np.allclose(run_means(durations, columns['run_id']), [0.075, 0.075])
@@ -0,0 +1,78 @@
+import glob
+import json
+import os
+
+import numpy as np
+import pytest
+
+from event_cache import CachedIndex
+from log_index import correlate_pods, index_log, service_events, service_instances, service_pods
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "log-outputs")
+
+LINES = [
+    # revision 00002 shows up first, a pod is scheduled before it is created, a pod is scheduled without a node
+    # (a JSON line of pod_logger.py with node null)
+    ("Created", "hello-5-instances-00002-deployment-aaaa-p1", "None", 100.5),
+    ("Created", "hello-5-instances-00001-deployment-bbbb-p2", "None", 100.75),
+    ("Scheduled", "hello-5-instances-00002-deployment-aaaa-p1", "node-1", 101.0),
+    ("Scheduled", "hello-5-instances-00002-deployment-aaaa-p1", "node-2", 101.25),
+    ("Scheduled", "hello-5-instances-00001-deployment-bbbb-p3", "node-2", 101.5),
+    ("Created", "hello-5-instances-00001-deployment-bbbb-p3", "None", 101.625),
+    ("Scheduled", "hello-5-instances-00001-deployment-bbbb-p2", None, 102.0),
+    ("Created", "hello-1-instances-00001-deployment-cccc-p4", "None", 103.0),
+    ("Deleted", "hello-5-instances-00001-deployment-bbbb-p5", "None", 103.5),
+]
+
+
+def write_log(path):
+    with open(path, 'w') as f:
+        for event_type, pod, node, timestamp in LINES:
+            if node is None:
+                f.write(json.dumps({'event': event_type, 'pod': pod, 'node': node, 'timestamp': timestamp}) + "\n")
+                continue
+            f.write(f"2024-06-15 12:00:00.000 Event: Pod {event_type}, Pod: {pod}, Namespace: default, "
+                    f"Node: {node}, Timestamp: {timestamp}\n")
+    return str(path)
+
+
+def pod_rows(pods):
+    # (creation, scheduled, node name, deployment key) of every pod, in table order
+    return [(pods.creation[i], pods.scheduled[i], pods.nodes[pods.node[i]] if pods.node[i] >= 0 else "-",
+             pods.deployments[pods.deployment[i]]) for i in range(len(pods))]
+
+
+def assert_same_tables(log_file):
+    index = index_log(log_file, use_cache=False)
+    index_log(log_file)
+    cached = index_log(log_file)
+    assert isinstance(cached, CachedIndex)
+    assert service_instances(cached) == service_instances(index)
+    for instances in service_instances(index):
+        assert list(service_events(cached, instances)) == list(service_events(index, instances))
+        expected = pod_rows(correlate_pods(service_events(index, instances)))
+        got = pod_rows(service_pods(cached, instances))
+        np.testing.assert_equal(got, expected)
+
+
+def test_cached_pod_tables_match_correlate_pods(tmp_path):
+    assert_same_tables(write_log(tmp_path / "pod_event_logs_edge.txt"))
+
+
+def test_cache_keeps_first_events_only(tmp_path):
+    log_file = write_log(tmp_path / "pod_event_logs_edge.txt")
+    index_log(log_file)
+    cached = index_log(log_file)
+    assert len(cached.records) == len(LINES) - 1
+    pods = service_pods(cached, 5)
+    assert len(pods) == 3
+    assert list(pods.scheduled) == [101.0, 102.0, 101.5]
+    assert pods.nodes[pods.node[1]] is None
+
+
+@pytest.mark.parametrize("log_file", sorted(glob.glob(os.path.join(LOG_DIR, "pod_event_logs_*-1-100.txt")))[:3])
+def test_bundled_logs(tmp_path, log_file):
+    copy = tmp_path / os.path.basename(log_file)
+    with open(log_file, 'r') as f:
+        copy.write_text(f.read())
+    assert_same_tables(str(copy))
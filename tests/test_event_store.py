@@ -0,0 +1,83 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from event_store import connect, ingest, ingest_log, store_columns
+from flexsched_analyze import compute_metrics
+from log_index import index_log, service_pods
+from metrics_engine import pod_columns
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "log-outputs")
+LOG_NAME = "pod_event_logs_rr_sleep_5s-1-100.txt"
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = str(tmp_path / LOG_NAME)
+    shutil.copy(os.path.join(LOG_DIR, LOG_NAME), path)
+    return path
+
+
+def node_names(columns):
+    return [columns['nodes'][i] for i in columns['node_id']]
+
+
+def test_store_columns_match_the_pod_table(tmp_path, log_file):
+    conn = connect(str(tmp_path / "events.sqlite"))
+    ingest(conn, [log_file])
+    index = index_log(log_file, use_cache=False)
+    for instances in [1, 5, 10, 25, 50, 100]:
+        expected = pod_columns(service_pods(index, instances))
+        columns = store_columns(conn, log_file, instances)
+        for key in ['creation_ts', 'scheduled_ts', 'run_id']:
+            assert np.array_equal(columns[key], expected[key])
+        assert node_names(columns) == node_names(expected)
+    conn.close()
+
+
+def test_reingesting_a_changed_log_replaces_its_rows(tmp_path, log_file):
+    conn = connect(str(tmp_path / "events.sqlite"))
+    assert ingest_log(conn, log_file)
+    assert not ingest_log(conn, log_file)
+    # keep the events of the 1- and 5-instance services only
+    with open(log_file, 'r') as f:
+        lines = [line for line in f if "hello-1-instances" in line or "hello-5-instances" in line]
+    with open(log_file, 'w') as f:
+        f.writelines(lines)
+    assert ingest_log(conn, log_file)
+    assert conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0] == 1
+    assert conn.execute("SELECT instances, COUNT(*) FROM pods GROUP BY instances ORDER BY instances").fetchall() == \
+        [(1, 5), (5, 25)]
+    assert conn.execute("SELECT COUNT(DISTINCT log_id) FROM events").fetchone()[0] == 1
+    conn.close()
+
+
+def test_percentile_aggregate(tmp_path):
+    conn = connect(str(tmp_path / "events.sqlite"))
+    conn.execute("CREATE TABLE t (g INTEGER, v REAL)")
+    values = [(0, 1.0), (0, 2.0), (0, 4.0), (0, None), (1, None)]
+    conn.executemany("INSERT INTO t VALUES (?, ?)", values)
+    rows = conn.execute("SELECT g, percentile(v, 50), percentile(v, 90) FROM t GROUP BY g ORDER BY g").fetchall()
+    assert rows[0] == (0, 2.0, pytest.approx(np.percentile([1.0, 2.0, 4.0], 90)))
+    assert rows[1] == (1, None, None)
+    conn.close()
+
+
+def test_compute_metrics_from_the_store(tmp_path, log_file):
+    config = {
+        'log_dir': str(tmp_path),
+        'instances': [1, 5],
+        'experiments': {'x': {'setups': [{'name': "rr_sleep_5s", 'label': "Sleep 5s"}]}},
+    }
+    store = str(tmp_path / "events.sqlite")
+    metrics = compute_metrics(config, ['x'], store=store)
+    expected = compute_metrics(config, ['x'], workers=1)
+    assert sorted(metrics) == sorted(expected) == [(log_file, 1), (log_file, 5)]
+    for key in metrics:
+        assert metrics[key]['summary'] == pytest.approx(expected[key]['summary'])
+    conn = connect(store)
+    assert conn.execute("SELECT experiment, setup, label, path FROM setups").fetchall() == \
+        [("x", "rr_sleep_5s", "Sleep 5s", os.path.abspath(log_file))]
+    conn.close()
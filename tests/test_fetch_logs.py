@@ -0,0 +1,75 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+from fetch_logs import fetch, load_cursors
+from log_io import open_log
+
+# A kubectl that lists the pods logger-a and logger-b and prints the first lines of state.json's 'lines' as the log
+# of every pod, one line per second from 12:00:00 with nanosecond timestamps like kubectl logs --timestamps.
+# A pod listed in 'invalid' prints a line that is not UTF-8.
+STUB = """#!{python}
+import datetime, json, os, sys
+state = json.load(open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "state.json")))
+args = sys.argv[1:]
+if args[0] == "get":
+    print("logger-a logger-b", end="")
+    sys.exit(0)
+pod = args[3]
+if pod in state["invalid"]:
+    sys.stdout.buffer.write(b"2024-06-15T12:00:00.000000000Z \\xff\\n")
+    sys.exit(0)
+since = next((a.split("=", 1)[1] for a in args if a.startswith("--since-time=")), None)
+for i in range(state["lines"]):
+    timestamp = (datetime.datetime(2024, 6, 15, 12) + datetime.timedelta(seconds=i)).strftime("%Y-%m-%dT%H:%M:%S")
+    if since is not None and timestamp < since.rstrip("Z"):
+        continue
+    print(f"{{timestamp}}.{{i:09d}}Z {{pod}} line {{i}}")
+"""
+
+
+@pytest.fixture
+def kubectl(tmp_path):
+    path = tmp_path / "kubectl"
+    path.write_text(STUB.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+
+    def set_state(lines, invalid=()):
+        (tmp_path / "state.json").write_text(json.dumps({'lines': lines, 'invalid': list(invalid)}))
+    set_state(0)
+    return str(path), set_state
+
+
+@pytest.mark.parametrize("name", ["events.txt", "events.txt.gz"])
+def test_fetch_appends_only_new_lines(tmp_path, kubectl, name):
+    path, set_state = kubectl
+    output = str(tmp_path / name)
+    set_state(3)
+    assert fetch(output, "default", "app=pod-event-logger", path, workers=2) == 6
+    set_state(5)
+    assert fetch(output, "default", "app=pod-event-logger", path, workers=2) == 4
+    assert fetch(output, "default", "app=pod-event-logger", path, workers=2) == 0
+
+    with open_log(output) as f:
+        lines = f.read().splitlines()
+    assert lines == ([f"logger-a line {i}" for i in range(3)] + [f"logger-b line {i}" for i in range(3)]
+                     + [f"logger-a line {i}" for i in range(3, 5)] + [f"logger-b line {i}" for i in range(3, 5)])
+    assert load_cursors(output) == {'logger-a': "2024-06-15T12:00:04.000000004", 'logger-b': "2024-06-15T12:00:04.000000004"}
+
+
+def test_cursor_of_written_pod_survives_a_failing_pod(tmp_path, kubectl):
+    path, set_state = kubectl
+    output = str(tmp_path / "events.txt")
+    set_state(2, invalid=["logger-b"])
+    with pytest.raises(UnicodeDecodeError):
+        fetch(output, "default", "app=pod-event-logger", path, workers=2)
+    assert load_cursors(output) == {'logger-a': "2024-06-15T12:00:01.000000001"}
+
+    set_state(2)
+    assert fetch(output, "default", "app=pod-event-logger", path, workers=2) == 2
+    with open(output) as f:
+        assert f.read().splitlines() == ["logger-a line 0", "logger-a line 1", "logger-b line 0", "logger-b line 1"]
+    assert os.path.exists(output + ".cursor")
@@ -0,0 +1,79 @@
+import os
+import shutil
+
+import pytest
+
+from analyze_logs import get_metrics
+from follow_logs import ServiceMetrics, follow, stream_metrics
+from log_index import index_log
+from metrics_engine import TAIL_COLUMNS
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "log-outputs")
+SUMMARY_COLUMNS = ["average start-up time", "start-up time std dev", "average queue time", "scheduling latency"] + TAIL_COLUMNS
+
+POD = "hello-1-instances-00001-deployment-aaaa-"
+
+
+def test_replay_matches_get_metrics(tmp_path):
+    # pods of the 100-instance service wait minutes for Scheduled, none of them may be given up on
+    log_file = str(tmp_path / "pod_event_logs_rr_sleep_5s-1-100.txt")
+    shutil.copy(os.path.join(LOG_DIR, "pod_event_logs_rr_sleep_5s-1-100.txt"), log_file)
+    with open(log_file, 'r') as f:
+        summaries = list(stream_metrics(f, interval=float('inf')))[-1]
+    index = index_log(log_file, use_cache=False)
+    assert [s['instances'] for s in summaries] == [1, 5, 10, 25, 50, 100]
+    for s in summaries:
+        assert s['pods'] == 5 * s['instances']
+        assert s['pending'] == 0 and s['dropped'] == 0
+        assert [s[column] for column in SUMMARY_COLUMNS] == pytest.approx(get_metrics(index, s['instances']), abs=1e-9)
+
+
+def test_created_pods_wait_and_orphans_time_out():
+    service = ServiceMetrics(1, orphan_timeout=60.0)
+    service.add_event(0.0, "Created", POD + "p0")
+    service.add_event(1.0, "Scheduled", POD + "orphan")
+    service.add_event(400.0, "Created", POD + "p1")
+    # p0 waits for Scheduled however long it takes, and holds back the pods that appeared after it
+    assert service.dropped == 0 and list(service.pending) == [POD + "p0", POD + "orphan", POD + "p1"]
+    service.add_event(401.0, "Scheduled", POD + "p0")
+    # the orphan never got its Created event, p1 is still waiting for Scheduled
+    assert service.summary()['pods'] == 1 and service.dropped == 1 and list(service.pending) == [POD + "p1"]
+    service.close()
+    assert service.dropped == 2 and not service.pending
+
+
+def test_max_pending_drops_the_oldest_pod():
+    service = ServiceMetrics(1, max_pending=2)
+    for i in range(3):
+        service.add_event(float(i), "Created", POD + f"p{i}")
+    assert service.dropped == 1 and list(service.pending) == [POD + "p1", POD + "p2"]
+
+
+def test_finished_window_dedup():
+    service = ServiceMetrics(1, finished_window=1)
+    service.add_event(0.0, "Created", POD + "p0")
+    service.add_event(1.0, "Scheduled", POD + "p0")
+    service.add_event(2.0, "Scheduled", POD + "p0")
+    assert service.summary()['pods'] == 1 and not service.pending
+    service.add_event(3.0, "Created", POD + "p1")
+    service.add_event(4.0, "Scheduled", POD + "p1")
+    # p0 has left the window of finished pods, a late duplicate of it is an orphan
+    service.add_event(5.0, "Scheduled", POD + "p1")
+    service.add_event(6.0, "Scheduled", POD + "p0")
+    assert service.summary()['pods'] == 2 and list(service.pending) == [POD + "p0"]
+
+
+def test_follow_holds_partial_lines_and_restarts_after_truncation(tmp_path):
+    log_file = str(tmp_path / "log.txt")
+    with open(log_file, 'w') as f:
+        f.write("a\nb\npart")
+    lines = follow(log_file, poll_interval=0)
+    assert [next(lines), next(lines), next(lines)] == ["a\n", "b\n", None]
+    with open(log_file, 'a') as f:
+        f.write("ial\n")
+    assert next(lines) == "partial\n"
+    assert next(lines) is None
+    with open(log_file, 'w') as f:
+        f.write("c\n")
+    assert [next(lines), next(lines)] == ["c\n", None]
+    lines.close()
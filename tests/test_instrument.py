@@ -0,0 +1,58 @@
+import gzip
+import os
+import shutil
+
+import pytest
+
+import instrument
+from log_index import index_log, service_pods
+from parallel import pod_index
+
+LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "log-outputs",
+                        "pod_event_logs_base-1-100.txt")
+PARSE_COUNTERS = ["lines read", "lines matched", "duplicate events dropped"]
+
+
+@pytest.fixture(autouse=True)
+def clean_instrument():
+    instrument.reset()
+    yield
+    instrument.reset()
+
+
+def test_nested_stages_are_exclusive(monkeypatch):
+    clock = iter([0.0, 1.0, 4.0, 10.0, 11.0, 12.0])
+    monkeypatch.setattr(instrument.time, "perf_counter", lambda: next(clock))
+    with instrument.timer("index"):
+        with instrument.timer("parse"):
+            pass
+        with instrument.timer("parse"):
+            pass
+    assert instrument.timers == {'parse': (4.0, 2), 'index': (8.0, 1)}
+
+
+def parse_counters():
+    return {name: instrument.counters.get(name, 0) for name in PARSE_COUNTERS}
+
+
+def test_counters_do_not_depend_on_the_code_path(tmp_path):
+    plain = str(tmp_path / os.path.basename(LOG_FILE))
+    shutil.copyfile(LOG_FILE, plain)
+    with open(LOG_FILE, 'rb') as f, gzip.open(plain + ".gz", 'wb') as out:
+        shutil.copyfileobj(f, out)
+
+    index_log(plain, use_cache=False)
+    expected = parse_counters()
+    with open(LOG_FILE, 'r') as f:
+        assert expected['lines read'] == sum(1 for _ in f)
+    assert expected['duplicate events dropped'] > 0
+
+    for build in [lambda: index_log(plain), lambda: index_log(plain),
+                  lambda: pod_index(plain, workers=1, chunk_size=1 << 16),
+                  lambda: pod_index(plain + ".gz", workers=1, chunk_size=1 << 16)]:
+        instrument.reset()
+        index = build()
+        assert parse_counters() == expected
+        service_pods(index, 100)
+        assert instrument.counters['pods correlated'] == 100 * 5
+    assert instrument.counters['chunks parsed'] > 1
@@ -0,0 +1,55 @@
+import csv
+import os
+
+import pytest
+
+from analyze_logs import RESULTS_HEADER, get_metrics
+from experiments import experiment_setups, load_config, results_path
+from log_index import correlate_pods, index_log
+from metrics_engine import pod_columns, queue_times, summarize
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_results(path):
+    with open(path, 'r', newline='') as f:
+        rows = list(csv.reader(f, skipinitialspace=True))
+    assert rows[0] == RESULTS_HEADER
+    return {(row[0], int(row[1])): [float(value) for value in row[2:]] for row in rows[1:]}
+
+
+@pytest.mark.parametrize("experiment", ["2", "3", "4"])
+def test_published_results_match_the_logs(monkeypatch, experiment):
+    # results/experiment_*_results.csv are what analyze_logs computes from the bundled logs, every column of it
+    monkeypatch.chdir(REPO)
+    config = load_config()
+    expected = read_results(results_path(config, experiment))
+    computed = {}
+    for setup in experiment_setups(config, experiment):
+        index = index_log(setup['path'], use_cache=False)
+        for instance in setup['instances']:
+            computed[(setup['name'], instance)] = list(get_metrics(index, instance))
+    assert list(computed) == list(expected)
+    for key, values in expected.items():
+        assert computed[key] == pytest.approx(values, rel=1e-12, abs=1e-15), key
+
+
+def test_queue_time_and_scheduling_latency():
+    # three pods: the second is created while the first is still pending, the third after the second is scheduled
+    events = [
+        (10.0, "Created", "hello-1-instances-00001-deployment-a-p1", None),
+        (10.5, "Created", "hello-1-instances-00001-deployment-a-p2", None),
+        (11.0, "Scheduled", "hello-1-instances-00001-deployment-a-p1", "node-1"),
+        (11.0, "Scheduled", "hello-1-instances-00001-deployment-a-p1", "node-1"),
+        (11.5, "Scheduled", "hello-1-instances-00001-deployment-a-p2", "node-2"),
+        (12.0, "Created", "hello-1-instances-00001-deployment-a-p3", None),
+        (12.25, "Scheduled", "hello-1-instances-00001-deployment-a-p3", "node-1"),
+    ]
+    columns = pod_columns(correlate_pods(events))
+    assert queue_times(columns).tolist() == [0.0, 0.5, 0.0]
+    average_startup, std_dev, average_queue, scheduling_latency = summarize(columns)
+    assert average_startup == pytest.approx((1.0 + 1.0 + 0.25) / 3)
+    assert average_queue == pytest.approx(0.25)
+    # start-up time minus queue time, without the first pod
+    assert scheduling_latency == pytest.approx((0.5 + 0.25) / 2)
+    assert columns['nodes'] == ["node-1", "node-2"]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from node_stats import grouped_percentiles, node_metrics, node_rows, placement_imbalance, throughput_rows
+
+
+def make_columns():
+    # 4 pods alternating over nodes a and b, each created before the previous one is scheduled
+    return {
+        'nodes': ["a", "b"],
+        'node_id': np.array([0, 1, 0, 1]),
+        'creation_ts': np.array([0.0, 1.0, 2.0, 3.0]),
+        'scheduled_ts': np.array([10.0, 11.0, 12.5, 13.0]),
+    }
+
+
+def test_grouped_percentiles():
+    values = np.array([5.0, 1.0, 3.0, 2.0, 4.0])
+    groups = np.array([0, 1, 0, 1, 0])
+    result = grouped_percentiles(values, groups, 3, [0, 50, 100])
+    assert result.tolist() == [[3.0, 4.0, 5.0], [1.0, 1.0, 2.0], [0.0, 0.0, 0.0]]
+
+
+def test_placement_imbalance():
+    assert placement_imbalance(np.array([], dtype=np.int64)) == (0.0, 0.0)
+    assert placement_imbalance(np.array([0, 0])) == (0.0, 0.0)
+    assert placement_imbalance(np.array([2, 2])) == (0.0, 0.0)
+    assert placement_imbalance(np.array([3, 1])) == pytest.approx((0.5, 0.5))
+
+
+def test_node_metrics():
+    metrics = node_metrics(make_columns(), all_nodes=["b", "c"])
+    assert metrics['nodes'] == ["a", "b", "c"]
+    assert metrics['pods'].tolist() == [2, 2, 0]
+    assert metrics['share'].tolist() == [0.5, 0.5, 0.0]
+    # the first pod is left out of the scheduling latencies: a gets 1.5, b gets 1.0 and 0.5
+    assert metrics['mean scheduling latency'] == pytest.approx([1.5, 0.75, 0.0])
+    assert metrics['scheduling latency std dev'] == pytest.approx([0.0, 0.25, 0.0])
+    assert metrics['max scheduling latency'] == pytest.approx([1.5, 1.0, 0.0])
+    assert metrics['scheduling latency percentiles'] == pytest.approx(np.array([[1.5] * 3, [0.5] * 3, [0.0] * 3]))
+    assert metrics['imbalance'] == pytest.approx(0.5)
+    assert metrics['coefficient of variation'] == pytest.approx(np.std([2, 2, 0]) / np.mean([2, 2, 0]))
+
+
+def test_throughput_matrix():
+    metrics = node_metrics(make_columns(), bucket=1.0, all_nodes=["c"])
+    assert metrics['throughput start'] == 10.0
+    assert metrics['throughput'].tolist() == [[1, 0, 1, 0], [0, 1, 0, 1], [0, 0, 0, 0]]
+    assert node_metrics(make_columns(), bucket=2.0)['throughput'].tolist() == [[0.5, 0.5], [0.5, 0.5]]
+    assert throughput_rows("s", 2, metrics) == [["s", 2, "a", 0.0, 1.0], ["s", 2, "a", 2.0, 1.0],
+                                                ["s", 2, "b", 1.0, 1.0], ["s", 2, "b", 3.0, 1.0]]
+    assert [row[:4] + row[-4:-2] for row in node_rows("s", 2, metrics)] == \
+        [["s", 2, "a", 2, 1.5, 1.0], ["s", 2, "b", 2, 1.0, 1.0], ["s", 2, "c", 0, 0.0, 0.0]]
+
+
+def test_no_pods():
+    columns = {'nodes': [], 'node_id': np.zeros(0, dtype=np.int64), 'creation_ts': np.zeros(0), 'scheduled_ts': np.zeros(0)}
+    metrics = node_metrics(columns, all_nodes=["a"])
+    assert metrics['pods'].tolist() == [0]
+    assert metrics['throughput'].shape == (1, 0)
+    assert node_rows("s", 1, metrics)[0][3:5] == [0, 0.0]
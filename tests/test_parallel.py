@@ -0,0 +1,53 @@
+import gzip
+import os
+import shutil
+
+import pytest
+
+import parallel
+from analyze_logs import get_metrics
+from log_index import index_log
+from log_io import chunk_ranges, read_range
+from parallel import file_metrics, pod_index, sweep
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "log-outputs")
+LOG_FILES = [os.path.join(LOG_DIR, f"pod_event_logs_{name}-1-100.txt") for name in ["base", "2_worker"]]
+
+
+@pytest.fixture
+def logs(tmp_path):
+    # plain and gzip copies of the logs, so no cache is written next to the bundled ones
+    copies = []
+    for log_file in LOG_FILES:
+        plain = str(tmp_path / os.path.basename(log_file))
+        shutil.copyfile(log_file, plain)
+        with open(log_file, 'rb') as f, gzip.open(plain + ".gz", 'wb') as out:
+            shutil.copyfileobj(f, out)
+        copies.append(plain)
+    return copies
+
+
+def test_chunk_ranges_split_at_newlines(logs):
+    ranges = chunk_ranges(logs[0], 10000)
+    assert len(ranges) > 10
+    assert ranges[0][0] == 0 and ranges[-1][1] == os.path.getsize(logs[0])
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    lines = [line for start, end in ranges for line in read_range(logs[0], start, end)]
+    with open(logs[0], 'r') as f:
+        assert lines == f.readlines()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("suffix", ["", ".gz"])
+def test_chunked_index_matches_whole_file_index(logs, workers, suffix):
+    # duplicates of a pod end up in different chunks, merging must keep only the first of them
+    for log_file in logs:
+        expected = index_log(log_file, use_cache=False)
+        assert pod_index(log_file + suffix, workers, chunk_size=20000) == expected
+
+
+def test_sweep_large_logs_gives_the_same_metrics(logs, monkeypatch):
+    jobs = [(log_file, [1, 25, 100]) for log_file in logs]
+    expected = [file_metrics(get_metrics, *job) for job in jobs]
+    monkeypatch.setattr(parallel, "LARGE_LOG", 0)
+    assert sweep(get_metrics, jobs, workers=2) == expected
@@ -0,0 +1,139 @@
+import asyncio
+import importlib.util
+import io
+import json
+import os
+import signal
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+POD_LOGGER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pod-logger", "pod_logger.py")
+
+
+class ApiException(Exception):
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+def make_pod(uid, node=None, resource_version="0"):
+    return SimpleNamespace(metadata=SimpleNamespace(uid=uid, name=f"pod-{uid}", namespace="default",
+                                                    resource_version=resource_version),
+                           spec=SimpleNamespace(node_name=node), status=SimpleNamespace(conditions=None))
+
+
+class FakeCluster:
+    # Stands in for the API server: every list returns the next entry of {lists}, every watch replays the next entry
+    # of {watches}, a list of watch events that may end with an exception or "SIGTERM"
+    def __init__(self, lists, watches):
+        self.lists = lists
+        self.watches = watches
+        self.watched_versions = []
+
+    async def list_pod_for_all_namespaces(self):
+        resource_version, pods = self.lists.pop(0)
+        return SimpleNamespace(metadata=SimpleNamespace(resource_version=resource_version), items=pods)
+
+    async def stream(self, resource_version):
+        self.watched_versions.append(resource_version)
+        for event in self.watches.pop(0):
+            if isinstance(event, Exception):
+                raise event
+            if event == "SIGTERM":
+                os.kill(os.getpid(), signal.SIGTERM)
+                await asyncio.sleep(3600)
+            yield {'type': event[0], 'object': event[1]}
+
+
+@pytest.fixture
+def fake_kubernetes(monkeypatch):
+    # kubernetes_asyncio is not needed to run the logger's own logic: install a minimal stand-in for this test only
+    cluster = FakeCluster([], [])
+
+    class ApiClient:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+    class Watch:
+        def stream(self, list_function, *args, resource_version=None, timeout_seconds=None):
+            return cluster.stream(resource_version)
+
+        def stop(self):
+            pass
+
+    package = types.ModuleType("kubernetes_asyncio")
+    package.client = types.ModuleType("kubernetes_asyncio.client")
+    package.client.ApiClient = ApiClient
+    package.client.CoreV1Api = lambda api: cluster
+    package.client.exceptions = types.ModuleType("kubernetes_asyncio.client.exceptions")
+    package.client.exceptions.ApiException = ApiException
+    package.config = types.ModuleType("kubernetes_asyncio.config")
+    package.config.ConfigException = Exception
+    package.config.load_incluster_config = lambda: None
+    package.watch = types.ModuleType("kubernetes_asyncio.watch")
+    package.watch.Watch = Watch
+    for module in [package, package.client, package.client.exceptions, package.config, package.watch]:
+        monkeypatch.setitem(sys.modules, module.__name__, module)
+
+    spec = importlib.util.spec_from_file_location("pod_logger", POD_LOGGER)
+    pod_logger = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(pod_logger)
+    return pod_logger, cluster
+
+
+def logged_events(out):
+    return [(event['event'], event['pod'], event['node']) for event in map(json.loads, out.getvalue().splitlines())]
+
+
+def test_relist_after_gone_catches_up_and_sigterm_flushes(fake_kubernetes):
+    pod_logger, cluster = fake_kubernetes
+    cluster.lists = [
+        ("1", [make_pod("a", "n1"), make_pod("b")]),
+        # after the 410: a was deleted, b was bound and c and d were created while nothing was watched
+        ("5", [make_pod("b", "n1"), make_pod("c"), make_pod("d", "n2")]),
+    ]
+    cluster.watches = [
+        # status updates of a scheduled pod are logged once
+        [("MODIFIED", make_pod("a", "n1", "2")), ("MODIFIED", make_pod("a", "n1", "3")), ApiException(410)],
+        [("MODIFIED", make_pod("c", "n2", "6")), ("MODIFIED", make_pod("b", "n1", "7")), "SIGTERM"],
+    ]
+    out = io.StringIO()
+    logger = pod_logger.PodEventLogger(None, out, pod_logger.format_json, flush_interval=60)
+    asyncio.run(logger.run())
+
+    # the writer was stopped by SIGTERM and still wrote every event queued before it
+    assert logged_events(out) == [
+        ("Created", "pod-a", "n1"), ("Scheduled", "pod-a", "n1"), ("Created", "pod-b", None),
+        ("Scheduled", "pod-b", "n1"), ("Created", "pod-c", None), ("Created", "pod-d", "n2"),
+        ("Scheduled", "pod-d", "n2"), ("Scheduled", "pod-c", "n2"),
+    ]
+    assert cluster.watched_versions == ["1", "5"]
+    assert logger.known == {"b", "c", "d"} and logger.scheduled == {"b", "c", "d"}
+
+
+def test_keep_duplicates_and_deleted_pods(fake_kubernetes):
+    pod_logger, _ = fake_kubernetes
+    logger = pod_logger.PodEventLogger(None, io.StringIO(), pod_logger.format_json, keep_duplicates=True)
+    logger.handle("ADDED", make_pod("a"))
+    logger.handle("MODIFIED", make_pod("a", "n1"))
+    logger.handle("MODIFIED", make_pod("a", "n1"))
+    logger.handle("DELETED", make_pod("a", "n1"))
+    assert [logger.queue.get_nowait()[1] for _ in range(logger.queue.qsize())] == ["Created", "Scheduled", "Scheduled"]
+    assert not logger.known and not logger.scheduled
+
+
+def test_a_failing_watch_stops_the_logger(fake_kubernetes):
+    pod_logger, cluster = fake_kubernetes
+    cluster.lists = [("1", [make_pod("a")])]
+    cluster.watches = [[ApiException(403)]]
+    out = io.StringIO()
+    logger = pod_logger.PodEventLogger(None, out, pod_logger.format_json, flush_interval=60)
+    with pytest.raises(ApiException):
+        asyncio.run(logger.run())
+    assert logged_events(out) == [("Created", "pod-a", None)]
@@ -0,0 +1,36 @@
+import numpy as np
+
+from queue_depth import burst_queue_depth_series, queue_depth, queue_depth_series
+
+COLUMNS = {
+    'creation_ts': np.array([0.0, 1.0, 3.0]),
+    'scheduled_ts': np.array([2.0, 3.0, 6.0]),
+}
+
+
+def test_queue_depth_takes_scheduled_first_at_equal_times():
+    times, depth = queue_depth(COLUMNS)
+    assert times.tolist() == [0.0, 1.0, 2.0, 3.0, 3.0, 6.0]
+    assert depth.tolist() == [1, 2, 1, 0, 1, 0]
+
+
+def test_queue_depth_series():
+    series = queue_depth_series(COLUMNS, bucket=2.0)
+    assert series['time'].tolist() == [0.0, 2.0, 4.0, 6.0]
+    assert series['depth'].tolist() == [2, 1, 1, 0]
+    # bucket 1 starts at depth 2 before its first pod is scheduled
+    assert series['max depth'].tolist() == [2, 2, 1, 1]
+    assert series['throughput'].tolist() == [0.0, 1.0, 0.0, 0.5]
+    empty = queue_depth_series({'creation_ts': np.zeros(0), 'scheduled_ts': np.zeros(0)})
+    assert len(empty['time']) == 0
+
+
+def test_every_burst_starts_at_time_zero():
+    columns = {
+        'creation_ts': np.r_[COLUMNS['creation_ts'], COLUMNS['creation_ts'] + 100],
+        'scheduled_ts': np.r_[COLUMNS['scheduled_ts'], COLUMNS['scheduled_ts'] + 100],
+        'run_id': np.array([0, 0, 0, 1, 1, 1]),
+    }
+    first, second = burst_queue_depth_series(columns, bucket=2.0)
+    for key in ['time', 'depth', 'max depth', 'throughput']:
+        assert first[key].tolist() == second[key].tolist() == queue_depth_series(COLUMNS, bucket=2.0)[key].tolist()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from sketch import QuantileSketch
+
+QUANTILES = [0.0, 0.01, 0.5, 0.9, 0.95, 0.99, 1.0]
+
+
+def exact_quantile(values, q):
+    # the value the sketch estimates: the one at rank q * (n - 1), rounded down
+    return np.sort(values)[int(q * (len(values) - 1))]
+
+
+def test_quantiles_within_relative_accuracy():
+    values = np.random.default_rng(0).lognormal(-3, 1.5, 20000)
+    sketch = QuantileSketch(0.01)
+    sketch.add_many(values)
+    for q in QUANTILES:
+        assert sketch.quantile(q) == pytest.approx(exact_quantile(values, q), rel=0.01)
+    assert sketch.max == values.max()
+    assert sketch.count == len(values)
+
+
+def test_negative_and_zero_values():
+    values = np.array([-2.0, -1.0, 0.0, 0.0, 0.0, 1.0, 2.0, 4.0])
+    sketch = QuantileSketch(0.01)
+    sketch.add_many(values)
+    for q in QUANTILES:
+        assert sketch.quantile(q) == pytest.approx(exact_quantile(values, q), rel=0.01)
+    assert QuantileSketch().quantile(0.5) == 0
+
+
+def test_add_many_matches_add():
+    values = np.random.default_rng(1).normal(0, 1, 1000)
+    one_by_one = QuantileSketch()
+    for value in values.tolist():
+        one_by_one.add(value)
+    at_once = QuantileSketch()
+    at_once.add_many(values)
+    assert (one_by_one.positive, one_by_one.negative, one_by_one.zero_count) == \
+        (at_once.positive, at_once.negative, at_once.zero_count)
+    assert (one_by_one.min, one_by_one.max) == (at_once.min, at_once.max)
+
+
+def test_merge_equals_sketch_of_all_values():
+    values = np.random.default_rng(2).exponential(0.1, 5000)
+    whole = QuantileSketch()
+    whole.add_many(values)
+    merged = QuantileSketch()
+    for chunk in np.array_split(values, 7):
+        part = QuantileSketch()
+        part.add_many(chunk)
+        merged.merge(part)
+    assert [merged.quantile(q) for q in QUANTILES] == [whole.quantile(q) for q in QUANTILES]
+    with pytest.raises(ValueError):
+        merged.merge(QuantileSketch(0.05))
@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from log_index import first_events, parse_log_line
+from synth_logs import format_line, generate
+
+
+def logger_prefix(timestamp):
+    # pod-logger/pod_logger.py format_text
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+@pytest.mark.parametrize("timestamp", [1718453145.9999996, 1718453145.9995, 1718453145.0, 1718453145.0004999])
+def test_format_line_prefix_matches_the_logger(timestamp):
+    line = format_line(timestamp, "Created", "hello-1-instances-00001-deployment-a-b", None)
+    assert line.startswith(logger_prefix(timestamp) + " Event: Pod Created")
+    assert parse_log_line(line)[0] == timestamp
+
+
+def test_format_line_random_timestamps():
+    rng = np.random.default_rng(0)
+    for timestamp in (1718453145 + rng.random(10000) * 1000).tolist():
+        assert format_line(timestamp, "Created", "pod", None)[:23] == logger_prefix(timestamp)
+
+
+def test_generate_bursts():
+    lines = list(generate([1, 5], 2, start=1718453145.0, seed=1))
+    index, counts = first_events(lines)
+    assert sorted(index) == [1, 5]
+    assert len(index[5]['00001']) == 2 * 5 * 2
+    assert counts['lines read'] == len(lines)
+    assert counts['duplicate events dropped'] == len(lines) - 2 * 12